@@ -208,7 +208,9 @@ class Settings:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "3000"))
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+    CORS_ORIGINS: List[str] = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
     STORAGE_PATH: str = os.getenv("STORAGE_PATH", "./storage")
     AGENT_CONFIGS_FILE: str = os.getenv("AGENT_CONFIGS_FILE", "agent_configurations.json")
     MCP_SERVERS_FILE: str = os.getenv("MCP_SERVERS_FILE", "mcp_servers.json")
@@ -154,6 +154,16 @@ class MCPService:
             }
         return result
     
+    def get_servers_summary(self) -> Dict[str, Dict[str, str]]:
+        """Get display name and status of all MCP servers without serializing their configs"""
+        return {
+            server_name: {
+                "display_name": server_info.config.display_name,
+                "status": server_info.status.value
+            }
+            for server_name, server_info in self.servers.items()
+        }
+    
     def delete_server(self, server_name: str) -> bool:
         """Delete an MCP server configuration"""
         try:
@@ -2,177 +2,178 @@
 Example agent configurations for the Agent Platform
 """
 
+from __future__ import annotations
+
 import os
 import sys
+from functools import lru_cache
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.config import AgentConfig, LLMConfig, ToolConfig, MemoryConfig, AgentType, ToolType, MemoryType, LLMProvider
+from app.config import AgentConfig, AgentType, ToolType, MemoryType, LLMProvider
+
+# Example configurations are kept as plain data and validated through the
+# model's compiled validator only when an agent is actually requested.
+
+# Tool definitions shared by several agents; each agent only overrides the description
+_CALCULATOR_TOOL = {"name": "calculator", "type": ToolType.CALCULATOR, "enabled": True}
+_FILE_READER_TOOL = {"name": "file_reader", "type": ToolType.FILE_READER, "enabled": True}
 
 # Example 1: Simple Calculator Agent
-calculator_agent = AgentConfig(
-    name="calculator_agent",
-    description="A specialized agent for mathematical calculations and problem solving",
-    agent_type=AgentType.REACT,
-    llm=LLMConfig(
-        model="llama3-8b-8192",
-        provider=LLMProvider.GROQ,
-        temperature=0.1,  # Low temperature for precise calculations
-        max_tokens=1024
-    ),
-    system_prompt="""You are a mathematical assistant specialized in solving calculations and math problems. 
+_CALCULATOR_AGENT = {
+    "name": "calculator_agent",
+    "description": "A specialized agent for mathematical calculations and problem solving",
+    "agent_type": AgentType.REACT,
+    "llm": {
+        "model": "llama3-8b-8192",
+        "provider": LLMProvider.GROQ,
+        "temperature": 0.1,  # Low temperature for precise calculations
+        "max_tokens": 1024
+    },
+    "system_prompt": """You are a mathematical assistant specialized in solving calculations and math problems. 
     Always use the calculator tool for any mathematical operations. Provide step-by-step explanations for complex problems.""",
-    tools=[
-        ToolConfig(
-            name="calculator",
-            type=ToolType.CALCULATOR,
-            description="Perform mathematical calculations",
-            enabled=True
-        )
+    "tools": [
+        {**_CALCULATOR_TOOL, "description": "Perform mathematical calculations"}
     ],
-    memory=MemoryConfig(type=MemoryType.BUFFER, max_tokens=1000)
-)
+    "memory": {"type": MemoryType.BUFFER, "max_tokens": 1000}
+}
 
 # Example 2: Research Assistant Agent
-research_agent = AgentConfig(
-    name="research_assistant",
-    description="An agent that can search the web and read files for research tasks",
-    agent_type=AgentType.REACT,
-    llm=LLMConfig(
-        model="llama3-70b-8192",
-        provider=LLMProvider.GROQ,
-        temperature=0.7,
-        max_tokens=2048
-    ),
-    system_prompt="""You are a research assistant that helps users find and analyze information. 
+_RESEARCH_AGENT = {
+    "name": "research_assistant",
+    "description": "An agent that can search the web and read files for research tasks",
+    "agent_type": AgentType.REACT,
+    "llm": {
+        "model": "llama3-70b-8192",
+        "provider": LLMProvider.GROQ,
+        "temperature": 0.7,
+        "max_tokens": 2048
+    },
+    "system_prompt": """You are a research assistant that helps users find and analyze information. 
     Use web search to find current information and file reading capabilities to analyze documents. 
     Always cite your sources and provide comprehensive, well-structured responses.""",
-    tools=[
-        ToolConfig(
-            name="web_search",
-            type=ToolType.WEB_SEARCH,
-            description="Search the web for information",
-            enabled=True,
-            config={"max_results": 5}
-        ),
-        ToolConfig(
-            name="file_reader",
-            type=ToolType.FILE_READER,
-            description="Read and analyze text files",
-            enabled=True
-        ),
-        ToolConfig(
-            name="calculator",
-            type=ToolType.CALCULATOR,
-            description="Perform calculations if needed",
-            enabled=True
-        )
+    "tools": [
+        {
+            "name": "web_search",
+            "type": ToolType.WEB_SEARCH,
+            "description": "Search the web for information",
+            "enabled": True,
+            "config": {"max_results": 5}
+        },
+        {**_FILE_READER_TOOL, "description": "Read and analyze text files"},
+        {**_CALCULATOR_TOOL, "description": "Perform calculations if needed"}
     ],
-    memory=MemoryConfig(type=MemoryType.SUMMARY, max_tokens=3000)
-)
+    "memory": {"type": MemoryType.SUMMARY, "max_tokens": 3000}
+}
 
 # Example 3: API Integration Agent
-api_agent = AgentConfig(
-    name="api_integration_agent",
-    description="An agent specialized in making API calls and integrating with external services",
-    agent_type=AgentType.TOOL_CALLING,
-    llm=LLMConfig(
-        model="gpt-4",
-        provider=LLMProvider.OPENAI,
-        temperature=0.3,
-        max_tokens=1500
-    ),
-    system_prompt="""You are an API integration specialist. You can make HTTP requests to various APIs 
+_API_AGENT = {
+    "name": "api_integration_agent",
+    "description": "An agent specialized in making API calls and integrating with external services",
+    "agent_type": AgentType.TOOL_CALLING,
+    "llm": {
+        "model": "gpt-4",
+        "provider": LLMProvider.OPENAI,
+        "temperature": 0.3,
+        "max_tokens": 1500
+    },
+    "system_prompt": """You are an API integration specialist. You can make HTTP requests to various APIs 
     and help users integrate with external services. Always validate API responses and handle errors gracefully. 
     Provide clear explanations of API interactions and results.""",
-    tools=[
-        ToolConfig(
-            name="api_caller",
-            type=ToolType.API_CALLER,
-            description="Make HTTP API calls",
-            enabled=True,
-            config={"timeout": 30, "max_retries": 3}
-        ),
-        ToolConfig(
-            name="calculator",
-            type=ToolType.CALCULATOR,
-            description="Calculate values for API parameters",
-            enabled=True
-        )
+    "tools": [
+        {
+            "name": "api_caller",
+            "type": ToolType.API_CALLER,
+            "description": "Make HTTP API calls",
+            "enabled": True,
+            "config": {"timeout": 30, "max_retries": 3}
+        },
+        {**_CALCULATOR_TOOL, "description": "Calculate values for API parameters"}
     ],
-    memory=MemoryConfig(type=MemoryType.BUFFER, max_tokens=2000)
-)
+    "memory": {"type": MemoryType.BUFFER, "max_tokens": 2000}
+}
 
 # Example 4: Conversational Assistant
-conversational_agent = AgentConfig(
-    name="conversational_assistant",
-    description="A friendly conversational agent for general assistance and chat",
-    agent_type=AgentType.CONVERSATIONAL,
-    llm=LLMConfig(
-        model="mixtral-8x7b-32768",
-        provider=LLMProvider.GROQ,
-        temperature=0.8,
-        max_tokens=1024
-    ),
-    system_prompt="""You are a helpful and friendly AI assistant. You can engage in natural conversation 
+_CONVERSATIONAL_AGENT = {
+    "name": "conversational_assistant",
+    "description": "A friendly conversational agent for general assistance and chat",
+    "agent_type": AgentType.CONVERSATIONAL,
+    "llm": {
+        "model": "mixtral-8x7b-32768",
+        "provider": LLMProvider.GROQ,
+        "temperature": 0.8,
+        "max_tokens": 1024
+    },
+    "system_prompt": """You are a helpful and friendly AI assistant. You can engage in natural conversation 
     and help with a variety of tasks. Be personable, empathetic, and provide helpful responses. 
     Use tools when necessary to provide accurate information.""",
-    tools=[
-        ToolConfig(
-            name="calculator",
-            type=ToolType.CALCULATOR,
-            description="Help with calculations",
-            enabled=True
-        ),
-        ToolConfig(
-            name="web_search",
-            type=ToolType.WEB_SEARCH,
-            description="Search for current information",
-            enabled=False  # Disabled by default for simple conversation
-        )
+    "tools": [
+        {**_CALCULATOR_TOOL, "description": "Help with calculations"},
+        {
+            "name": "web_search",
+            "type": ToolType.WEB_SEARCH,
+            "description": "Search for current information",
+            "enabled": False  # Disabled by default for simple conversation
+        }
     ],
-    memory=MemoryConfig(type=MemoryType.BUFFER, max_tokens=2500)
-)
+    "memory": {"type": MemoryType.BUFFER, "max_tokens": 2500}
+}
 
 # Example 5: Code Assistant Agent
-code_agent = AgentConfig(
-    name="code_assistant",
-    description="An agent specialized in code analysis, execution, and programming help",
-    agent_type=AgentType.PLANNING,
-    llm=LLMConfig(
-        model="llama3-70b-8192",
-        provider=LLMProvider.GROQ,
-        temperature=0.2,
-        max_tokens=3000
-    ),
-    system_prompt="""You are a programming assistant that can help with code analysis, debugging, 
+_CODE_AGENT = {
+    "name": "code_assistant",
+    "description": "An agent specialized in code analysis, execution, and programming help",
+    "agent_type": AgentType.PLANNING,
+    "llm": {
+        "model": "llama3-70b-8192",
+        "provider": LLMProvider.GROQ,
+        "temperature": 0.2,
+        "max_tokens": 3000
+    },
+    "system_prompt": """You are a programming assistant that can help with code analysis, debugging, 
     and execution. You can read code files, execute code safely, and provide programming guidance. 
     Always explain your code suggestions and follow best practices.""",
-    tools=[
-        ToolConfig(
-            name="code_executor",
-            type=ToolType.CODE_EXECUTOR,
-            description="Execute code safely",
-            enabled=True,
-            config={"allowed_languages": ["python", "javascript"], "timeout": 10}
-        ),
-        ToolConfig(
-            name="file_reader",
-            type=ToolType.FILE_READER,
-            description="Read code files",
-            enabled=True
-        ),
-        ToolConfig(
-            name="calculator",
-            type=ToolType.CALCULATOR,
-            description="Calculate algorithmic complexity or numerical results",
-            enabled=True
-        )
+    "tools": [
+        {
+            "name": "code_executor",
+            "type": ToolType.CODE_EXECUTOR,
+            "description": "Execute code safely",
+            "enabled": True,
+            "config": {"allowed_languages": ["python", "javascript"], "timeout": 10}
+        },
+        {**_FILE_READER_TOOL, "description": "Read code files"},
+        {**_CALCULATOR_TOOL, "description": "Calculate algorithmic complexity or numerical results"}
     ],
-    memory=MemoryConfig(type=MemoryType.VECTOR, max_tokens=4000)
-)
+    "memory": {"type": MemoryType.VECTOR, "max_tokens": 4000}
+}
+
+@lru_cache(maxsize=None)
+def calculator_agent() -> AgentConfig:
+    """Example 1: Simple Calculator Agent"""
+    return AgentConfig.model_validate(_CALCULATOR_AGENT)
+
+@lru_cache(maxsize=None)
+def research_agent() -> AgentConfig:
+    """Example 2: Research Assistant Agent"""
+    return AgentConfig.model_validate(_RESEARCH_AGENT)
+
+@lru_cache(maxsize=None)
+def api_agent() -> AgentConfig:
+    """Example 3: API Integration Agent"""
+    return AgentConfig.model_validate(_API_AGENT)
+
+@lru_cache(maxsize=None)
+def conversational_agent() -> AgentConfig:
+    """Example 4: Conversational Assistant"""
+    return AgentConfig.model_validate(_CONVERSATIONAL_AGENT)
+
+@lru_cache(maxsize=None)
+def code_agent() -> AgentConfig:
+    """Example 5: Code Assistant Agent"""
+    return AgentConfig.model_validate(_CODE_AGENT)
 
-# Dictionary of all example agents
+# Dictionary of all example agent factories; each config is only built
+# (and validated) when its factory is first called
 EXAMPLE_AGENTS = {
     "calculator_agent": calculator_agent,
     "research_assistant": research_agent,
@@ -187,8 +188,8 @@ def create_example_agents():
     
     agent_service = AgentService()
     
-    for agent_name, agent_config in EXAMPLE_AGENTS.items():
-        success = agent_service.add_configuration(agent_name, agent_config)
+    for agent_name, factory in EXAMPLE_AGENTS.items():
+        success = agent_service.add_configuration(agent_name, factory())
         if success:
             print(f"Created example agent: {agent_name}")
         else:
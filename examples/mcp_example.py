@@ -7,14 +7,19 @@ This script shows how to:
 2. Configure agents to use MCP tools
 3. Execute agents with MCP capabilities
 4. Manage MCP server lifecycle
+
+Environment variables:
+    MCP_MAX_CONCURRENT_STARTS: Maximum number of MCP servers started at once (default: 4)
 """
 
 import asyncio
-import json
+import os
 import time
 from pathlib import Path
 import sys
 
+import orjson
+
 # Add the parent directory to the path so we can import from app
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -22,6 +27,19 @@ from app.services.agent_service import AgentService
 from app.services.mcp_service import MCPService
 from app.config import AgentConfig, MCPServerConfig, MCPTransport
 
+MAX_CONCURRENT_STARTS = int(os.getenv("MCP_MAX_CONCURRENT_STARTS", "4"))
+
+async def wait_for_servers(mcp_service, server_names, timeout=10.0, interval=0.1):
+    """Poll server health until all servers are ready, raising asyncio.TimeoutError after timeout"""
+    async def poll():
+        while True:
+            results = await asyncio.gather(*(mcp_service.health_check(name) for name in server_names))
+            if all(results):
+                return
+            await asyncio.sleep(interval)
+    
+    await asyncio.wait_for(poll(), timeout)
+
 async def main():
     """Main example function"""
     print("🚀 MCP Integration Example for DSP AI Agent Builder")
@@ -32,28 +50,50 @@ async def main():
     mcp_service = agent_service.get_mcp_service()
     
     print("\n📋 Step 1: Check available MCP servers")
-    servers = mcp_service.get_servers()
+    servers = mcp_service.get_servers_summary()
     print(f"Found {len(servers)} configured MCP servers:")
     for name, info in servers.items():
-        print(f"  - {name}: {info['config']['display_name']} ({info['status']})")
+        print(f"  - {name}: {info['display_name']} ({info['status']})")
     
     print("\n🔧 Step 2: Start MCP servers")
     server_names = ["weather", "memory", "calculator"]
     
-    for server_name in server_names:
-        print(f"Starting {server_name} server...")
-        try:
-            success = await mcp_service.start_server(server_name)
-            if success:
-                print(f"  ✅ {server_name} server started successfully")
-            else:
-                print(f"  ❌ Failed to start {server_name} server")
-        except Exception as e:
-            print(f"  ❌ Error starting {server_name}: {e}")
+    # Start servers concurrently, at most MAX_CONCURRENT_STARTS at a time. If one
+    # start fails catastrophically the TaskGroup cancels the remaining ones.
+    start_semaphore = asyncio.Semaphore(MAX_CONCURRENT_STARTS)
+    
+    async def start(server_name):
+        async with start_semaphore:
+            print(f"Starting {server_name} server...")
+            return await mcp_service.start_server(server_name)
     
-    # Wait a moment for servers to fully start
+    start_tasks = {}
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for server_name in server_names:
+                start_tasks[server_name] = tg.create_task(start(server_name))
+    except* Exception:
+        pass  # Reported per server below
+    
+    started = []
+    for server_name, task in start_tasks.items():
+        if task.cancelled():
+            print(f"  ❌ Start of {server_name} server was cancelled")
+        elif task.exception():
+            print(f"  ❌ Error starting {server_name}: {task.exception()}")
+        elif task.result():
+            print(f"  ✅ {server_name} server started successfully")
+            started.append(server_name)
+        else:
+            print(f"  ❌ Failed to start {server_name} server")
+    
+    # Wait until the started servers report healthy rather than for a fixed
+    # delay; servers that failed to start would only run out the timeout
     print("\n⏳ Waiting for servers to initialize...")
-    await asyncio.sleep(3)
+    try:
+        await wait_for_servers(mcp_service, started)
+    except asyncio.TimeoutError:
+        print("  ⚠️  Timed out waiting for servers, continuing anyway")
     
     print("\n🔍 Step 3: Discover server capabilities")
     for server_name in server_names:
@@ -61,52 +101,62 @@ async def main():
             await mcp_service.discover_capabilities(server_name)
             server_info = mcp_service.get_server(server_name)
             if server_info:
-                print(f"\n{server_name.title()} Server Capabilities:")
-                print(f"  Tools: {len(server_info.available_tools)}")
+                # Collect the listing and emit it with a single write
+                lines = [f"\n{server_name.title()} Server Capabilities:"]
+                lines.append(f"  Tools: {len(server_info.available_tools)}")
                 for tool in server_info.available_tools:
-                    print(f"    - {tool.get('name', 'Unknown')}: {tool.get('description', 'No description')}")
-                print(f"  Resources: {len(server_info.available_resources)}")
+                    lines.append(f"    - {tool.get('name', 'Unknown')}: {tool.get('description', 'No description')}")
+                lines.append(f"  Resources: {len(server_info.available_resources)}")
                 for resource in server_info.available_resources:
-                    print(f"    - {resource.get('name', 'Unknown')}: {resource.get('description', 'No description')}")
+                    lines.append(f"    - {resource.get('name', 'Unknown')}: {resource.get('description', 'No description')}")
+                print("\n".join(lines))
         except Exception as e:
             print(f"  ❌ Error discovering capabilities for {server_name}: {e}")
     
     print("\n🧪 Step 4: Test MCP tools directly")
     
+    # The weather, calculator and memory-store calls are independent, so
+    # dispatch them concurrently; only the memory retrieve depends on the store.
+    weather_result, calc_result, store_result = await asyncio.gather(
+        mcp_service.call_tool("weather", "get_weather", {"city": "New York"}),
+        mcp_service.call_tool("calculator", "calculate", {"expression": "2 + 3 * 4"}),
+        mcp_service.call_tool("memory", "store_memory", {
+            "key": "example_memory",
+            "content": "This is a test memory from the MCP example script",
+            "category": "examples"
+        }),
+        return_exceptions=True
+    )
+    
     # Test weather tool
     print("\n🌤️  Testing Weather Tool:")
-    try:
-        result = await mcp_service.call_tool("weather", "get_weather", {"city": "New York"})
-        print(f"  Weather result: {result.get('content', result)}")
-    except Exception as e:
-        print(f"  ❌ Weather tool error: {e}")
+    if isinstance(weather_result, Exception):
+        print(f"  ❌ Weather tool error: {weather_result}")
+    else:
+        print(f"  Weather result: {weather_result.get('content', weather_result)}")
     
     # Test calculator tool
     print("\n🧮 Testing Calculator Tool:")
-    try:
-        result = await mcp_service.call_tool("calculator", "calculate", {"expression": "2 + 3 * 4"})
-        print(f"  Calculator result: {result.get('content', result)}")
-    except Exception as e:
-        print(f"  ❌ Calculator tool error: {e}")
+    if isinstance(calc_result, Exception):
+        print(f"  ❌ Calculator tool error: {calc_result}")
+    else:
+        print(f"  Calculator result: {calc_result.get('content', calc_result)}")
     
     # Test memory tool
     print("\n🧠 Testing Memory Tool:")
-    try:
-        # Store a memory
-        store_result = await mcp_service.call_tool("memory", "store_memory", {
-            "key": "example_memory",
-            "content": "This is a test memory from the MCP example script",
-            "category": "examples"
-        })
+    if isinstance(store_result, Exception):
+        print(f"  ❌ Memory tool error: {store_result}")
+    else:
         print(f"  Memory store result: {store_result.get('content', store_result)}")
         
-        # Retrieve the memory
-        retrieve_result = await mcp_service.call_tool("memory", "retrieve_memory", {
-            "key": "example_memory"
-        })
-        print(f"  Memory retrieve result: {retrieve_result.get('content', retrieve_result)}")
-    except Exception as e:
-        print(f"  ❌ Memory tool error: {e}")
+        try:
+            # Retrieve the memory
+            retrieve_result = await mcp_service.call_tool("memory", "retrieve_memory", {
+                "key": "example_memory"
+            })
+            print(f"  Memory retrieve result: {retrieve_result.get('content', retrieve_result)}")
+        except Exception as e:
+            print(f"  ❌ Memory tool error: {e}")
     
     print("\n🤖 Step 5: Load and test MCP-enabled agents")
     
@@ -115,8 +165,8 @@ async def main():
     if mcp_config_file.exists():
         print(f"Loading MCP agent configurations from {mcp_config_file}")
         
-        with open(mcp_config_file, 'r') as f:
-            mcp_configs = json.load(f)
+        with open(mcp_config_file, 'rb') as f:
+            mcp_configs = orjson.loads(f.read())
         
         # Add a weather agent configuration
         if "weather_agent" in mcp_configs:
@@ -138,39 +188,41 @@ async def main():
             except Exception as e:
                 print(f"  ❌ Error loading calculator agent: {e}")
     
-    print("\n📊 Step 6: Server health check")
-    for server_name in server_names:
-        try:
-            is_healthy = await mcp_service.health_check(server_name)
+    lines = ["\n📊 Step 6: Server health check"]
+    health_results = await asyncio.gather(
+        *(mcp_service.health_check(server_name) for server_name in server_names),
+        return_exceptions=True
+    )
+    for server_name, is_healthy in zip(server_names, health_results):
+        if isinstance(is_healthy, Exception):
+            lines.append(f"  {server_name}: ❌ Error - {is_healthy}")
+        else:
             status = "✅ Healthy" if is_healthy else "❌ Unhealthy"
-            print(f"  {server_name}: {status}")
-        except Exception as e:
-            print(f"  {server_name}: ❌ Error - {e}")
-    
-    print("\n🎯 Step 7: Example usage scenarios")
-    print("\nYou can now use the MCP-enabled agents in several ways:")
-    print("\n1. Via API endpoints:")
-    print("   POST /api/v1/agents/weather_agent/execute")
-    print("   Body: {\"messages\": [{\"role\": \"user\", \"content\": \"What's the weather in Paris?\"}]}")
-    
-    print("\n2. Via MCP API endpoints:")
-    print("   GET /api/v1/mcp/servers - List all MCP servers")
-    print("   POST /api/v1/mcp/servers/weather/tools/get_weather/call")
-    print("   Body: {\"city\": \"London\"}")
+            lines.append(f"  {server_name}: {status}")
+    print("\n".join(lines))
     
-    print("\n3. Direct tool calls:")
-    print("   Use the mcp_service.call_tool() method as shown above")
-    
-    print("\n📝 Step 8: Available agent configurations")
     agent_names = agent_service.get_configuration_names()
-    print(f"Available agents: {', '.join(agent_names)}")
-    
-    print("\n✨ MCP Integration Example Complete!")
-    print("\nNext steps:")
-    print("1. Start the main application: python main.py")
-    print("2. Visit http://localhost:3000/docs for API documentation")
-    print("3. Test the MCP-enabled agents via the API")
-    print("4. Create your own MCP servers and integrate them")
+    print("\n".join([
+        "\n🎯 Step 7: Example usage scenarios",
+        "\nYou can now use the MCP-enabled agents in several ways:",
+        "\n1. Via API endpoints:",
+        "   POST /api/v1/agents/weather_agent/execute",
+        "   Body: {\"messages\": [{\"role\": \"user\", \"content\": \"What's the weather in Paris?\"}]}",
+        "\n2. Via MCP API endpoints:",
+        "   GET /api/v1/mcp/servers - List all MCP servers",
+        "   POST /api/v1/mcp/servers/weather/tools/get_weather/call",
+        "   Body: {\"city\": \"London\"}",
+        "\n3. Direct tool calls:",
+        "   Use the mcp_service.call_tool() method as shown above",
+        "\n📝 Step 8: Available agent configurations",
+        f"Available agents: {', '.join(agent_names)}",
+        "\n✨ MCP Integration Example Complete!",
+        "\nNext steps:",
+        "1. Start the main application: python main.py",
+        "2. Visit http://localhost:3000/docs for API documentation",
+        "3. Test the MCP-enabled agents via the API",
+        "4. Create your own MCP servers and integrate them",
+    ]))
     
     print("\n🛑 Stopping MCP servers...")
     for server_name in server_names:
@@ -181,4 +233,10 @@ async def main():
             print(f"  ❌ Error stopping {server_name}: {e}")
 
 if __name__ == "__main__":
+    # Use the libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
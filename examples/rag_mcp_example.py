@@ -15,11 +15,11 @@ Usage:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
 import httpx
+import orjson
 from typing import Dict, Any
 
 # Add project root to path
@@ -27,87 +27,85 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from app.services.agent_service import AgentService
-from app.services.mcp_service import MCPService
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def check_rag_service_health():
+RAG_MCP_SERVER_URL = "http://localhost:8005"
+
+async def check_rag_service_health(client: httpx.AsyncClient):
     """Check if the RAG service is running and healthy"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get("http://localhost:9000/api/v1/health")
-            if response.status_code == 200:
-                logger.info("✅ RAG service is healthy")
-                return True
-            else:
-                logger.error(f"❌ RAG service returned status {response.status_code}")
-                return False
+        response = await client.get("http://localhost:9000/api/v1/health", timeout=5.0)
+        if response.status_code == 200:
+            logger.info("✅ RAG service is healthy")
+            return True
+        else:
+            logger.error("❌ RAG service returned status %s", response.status_code)
+            return False
     except Exception as e:
-        logger.error(f"❌ RAG service is not accessible: {e}")
+        logger.error("❌ RAG service is not accessible: %s", e)
         return False
 
-async def check_rag_mcp_server():
+async def check_rag_mcp_server(client: httpx.AsyncClient):
     """Check if the RAG MCP server is running"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get("http://localhost:8005/health")
-            if response.status_code == 200:
-                health_data = response.json()
-                logger.info("✅ RAG MCP server is healthy")
-                logger.info(f"   RAG service connection: {'✅' if health_data.get('rag_service_healthy') else '❌'}")
-                return True
-            else:
-                logger.error(f"❌ RAG MCP server returned status {response.status_code}")
-                return False
+        response = await client.get("/health", timeout=5.0)
+        if response.status_code == 200:
+            health_data = response.json()
+            logger.info("✅ RAG MCP server is healthy")
+            logger.info("   RAG service connection: %s", '✅' if health_data.get('rag_service_healthy') else '❌')
+            return True
+        else:
+            logger.error("❌ RAG MCP server returned status %s", response.status_code)
+            return False
     except Exception as e:
-        logger.error(f"❌ RAG MCP server is not accessible: {e}")
+        logger.error("❌ RAG MCP server is not accessible: %s", e)
         return False
 
-async def test_rag_mcp_tools():
+async def test_rag_mcp_tools(client: httpx.AsyncClient):
     """Test RAG MCP tools directly"""
     logger.info("\n🔧 Testing RAG MCP Tools")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Test list configurations
-            logger.info("Testing list_configurations...")
-            response = await client.post(
-                "http://localhost:8005/tools/list_configurations",
-                json={"arguments": {"names_only": True}}
-            )
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"✅ Configurations: {result['content']}")
-            else:
-                logger.error(f"❌ List configurations failed: {response.status_code}")
-                return False
-            
-            # Test document retrieval
-            logger.info("Testing retrieve_documents...")
-            response = await client.post(
-                "http://localhost:8005/tools/retrieve_documents",
-                json={
-                    "arguments": {
-                        "query": "What is artificial intelligence?",
-                        "configuration_name": "default",
-                        "k": 3
-                    }
+        # Test list configurations
+        logger.info("Testing list_configurations...")
+        response = await client.post(
+            "/tools/list_configurations",
+            json={"arguments": {"names_only": True}}
+        )
+        if response.status_code == 200:
+            result = response.json()
+            logger.info("✅ Configurations: %s", result['content'])
+        else:
+            logger.error("❌ List configurations failed: %s", response.status_code)
+            return False
+        
+        # Test document retrieval
+        logger.info("Testing retrieve_documents...")
+        response = await client.post(
+            "/tools/retrieve_documents",
+            json={
+                "arguments": {
+                    "query": "What is artificial intelligence?",
+                    "configuration_name": "default",
+                    "k": 3
                 }
-            )
-            if response.status_code == 200:
-                result = response.json()
-                logger.info("✅ Document retrieval successful")
-                logger.info(f"   Result preview: {result['content'][:200]}...")
-            else:
-                logger.error(f"❌ Document retrieval failed: {response.status_code}")
-                logger.error(f"   Error: {response.text}")
-            
-            return True
-            
+            }
+        )
+        if response.status_code == 200:
+            result = response.json()
+            logger.info("✅ Document retrieval successful")
+            logger.info("   Result preview: %.200s...", result['content'])
+        else:
+            logger.error("❌ Document retrieval failed: %s", response.status_code)
+            logger.error("   Error: %s", response.text)
+        
+        return True
+        
     except Exception as e:
-        logger.error(f"❌ Error testing RAG MCP tools: {e}")
+        logger.error("❌ Error testing RAG MCP tools: %s", e)
         return False
 
 async def test_rag_agent():
@@ -117,23 +115,23 @@ async def test_rag_agent():
     try:
         # Initialize services
         agent_service = AgentService()
-        mcp_service = MCPService()
+        mcp_service = agent_service.get_mcp_service()
         
         # Load RAG agent configuration
         rag_config_path = os.path.join(project_root, "storage", "rag_agent_config.json")
         if not os.path.exists(rag_config_path):
-            logger.error(f"❌ RAG agent config not found: {rag_config_path}")
+            logger.error("❌ RAG agent config not found: %s", rag_config_path)
             return False
         
-        with open(rag_config_path, 'r') as f:
-            rag_config = json.load(f)
+        with open(rag_config_path, 'rb') as f:
+            rag_config = orjson.loads(f.read())
         
         # Add RAG server to MCP service
         await mcp_service.add_server({
             "name": "rag",
             "description": "RAG retrieval server",
             "transport": "http",
-            "url": "http://localhost:8005",
+            "url": RAG_MCP_SERVER_URL,
             "enabled": True,
             "timeout": 30
         })
@@ -152,110 +150,131 @@ async def test_rag_agent():
             "Search for information about machine learning"
         ]
         
-        for query in test_queries:
-            logger.info(f"\n📝 Query: {query}")
-            try:
-                response = await agent.ainvoke({"input": query})
-                logger.info(f"✅ Response: {response.get('output', 'No output')[:300]}...")
-            except Exception as e:
-                logger.error(f"❌ Query failed: {e}")
+        # Queries are independent, so run them concurrently; the semaphore
+        # keeps us under the LLM provider's rate limits
+        semaphore = asyncio.Semaphore(int(os.getenv("RAG_AGENT_MAX_CONCURRENCY", "3")))
+        
+        async def run_query(query: str):
+            async with semaphore:
+                return await agent.ainvoke({"input": query})
+        
+        responses = await asyncio.gather(
+            *(run_query(query) for query in test_queries),
+            return_exceptions=True
+        )
+        
+        for query, response in zip(test_queries, responses):
+            logger.info("\n📝 Query: %s", query)
+            if isinstance(response, Exception):
+                logger.error("❌ Query failed: %s", response)
+            else:
+                logger.info("✅ Response: %.300s...", response.get('output', 'No output'))
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Error testing RAG agent: {e}")
+        logger.error("❌ Error testing RAG agent: %s", e)
         return False
 
-async def demonstrate_multi_config_retrieval():
+async def demonstrate_multi_config_retrieval(client: httpx.AsyncClient):
     """Demonstrate multi-configuration retrieval with fusion"""
     logger.info("\n🔀 Testing Multi-Configuration Retrieval")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # First, list available configurations
-            response = await client.post(
-                "http://localhost:8005/tools/list_configurations",
-                json={"arguments": {"names_only": True}}
-            )
-            
-            if response.status_code != 200:
-                logger.error("❌ Could not list configurations")
-                return False
-            
-            # For demo, assume we have at least one config
-            response = await client.post(
-                "http://localhost:8005/tools/retrieve_multi_config",
-                json={
-                    "arguments": {
-                        "query": "machine learning algorithms",
-                        "configuration_names": ["default"],  # Use available configs
-                        "k": 3,
-                        "fusion_method": "rrf"
-                    }
+        # Available configurations were already listed by test_rag_mcp_tools,
+        # so go straight to retrieval; for demo, assume the default config exists
+        response = await client.post(
+            "/tools/retrieve_multi_config",
+            json={
+                "arguments": {
+                    "query": "machine learning algorithms",
+                    "configuration_names": ["default"],  # Use available configs
+                    "k": 3,
+                    "fusion_method": "rrf"
                 }
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                logger.info("✅ Multi-config retrieval successful")
-                logger.info(f"   Result: {result['content'][:300]}...")
-            else:
-                logger.error(f"❌ Multi-config retrieval failed: {response.status_code}")
-                logger.error(f"   Error: {response.text}")
+            }
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            logger.info("✅ Multi-config retrieval successful")
+            logger.info("   Result: %.300s...", result['content'])
+        else:
+            logger.error("❌ Multi-config retrieval failed: %s", response.status_code)
+            logger.error("   Error: %s", response.text)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Error in multi-config retrieval: {e}")
+        logger.error("❌ Error in multi-config retrieval: %s", e)
         return False
 
 async def main():
     """Main example function"""
-    print("=" * 60)
-    print("RAG MCP Integration Example")
-    print("=" * 60)
+    print("\n".join(["=" * 60, "RAG MCP Integration Example", "=" * 60]))
     
-    # Check prerequisites
-    logger.info("🔍 Checking prerequisites...")
-    
-    rag_healthy = await check_rag_service_health()
-    mcp_healthy = await check_rag_mcp_server()
+    # Share one client (and its keep-alive pool) across all probes. Relative
+    # URLs go to the RAG MCP server; HTTP/2 lets concurrent probes multiplex
+    # over a single connection.
+    client = httpx.AsyncClient(
+        base_url=RAG_MCP_SERVER_URL,
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+    try:
+        # Check prerequisites
+        logger.info("🔍 Checking prerequisites...")
     
-    if not rag_healthy:
-        logger.error("❌ RAG service is not running. Please start it first:")
-        logger.error("   cd path/to/rag/project && python app/main.py")
-        return
+        rag_healthy, mcp_healthy = await asyncio.gather(
+            check_rag_service_health(client),
+            check_rag_mcp_server(client)
+        )
     
-    if not mcp_healthy:
-        logger.error("❌ RAG MCP server is not running. Please start it first:")
-        logger.error("   python mcp_servers/start_rag_server.py")
-        return
+        if not rag_healthy:
+            logger.error("❌ RAG service is not running. Please start it first:")
+            logger.error("   cd path/to/rag/project && python app/main.py")
+            return
     
-    # Test MCP tools directly
-    tools_ok = await test_rag_mcp_tools()
-    if not tools_ok:
-        logger.error("❌ MCP tools testing failed")
-        return
+        if not mcp_healthy:
+            logger.error("❌ RAG MCP server is not running. Please start it first:")
+            logger.error("   python mcp_servers/start_rag_server.py")
+            return
     
-    # Test multi-config retrieval
-    await demonstrate_multi_config_retrieval()
+        # Test MCP tools directly
+        tools_ok = await test_rag_mcp_tools(client)
+        if not tools_ok:
+            logger.error("❌ MCP tools testing failed")
+            return
     
-    # Test RAG agent (optional, requires proper setup)
-    logger.info("\n⚠️  RAG agent testing requires proper environment setup")
-    logger.info("   Make sure NVIDIA_* environment variables are set")
+        # Test multi-config retrieval
+        await demonstrate_multi_config_retrieval(client)
     
-    # Uncomment to test RAG agent
-    # await test_rag_agent()
+        # Test RAG agent (optional, requires proper setup)
+        logger.info("\n⚠️  RAG agent testing requires proper environment setup")
+        logger.info("   Make sure NVIDIA_* environment variables are set")
     
-    print("\n" + "=" * 60)
-    print("RAG MCP Integration Example Complete!")
-    print("=" * 60)
+        # Uncomment to test RAG agent
+        # await test_rag_agent()
+    finally:
+        await client.aclose()
     
-    print("\n📚 Next Steps:")
-    print("1. Index some documents in your RAG service")
-    print("2. Set up environment variables for LLM access")
-    print("3. Use the RAG agent in your applications")
-    print("4. Explore multi-configuration retrieval for complex queries")
+    print("\n".join([
+        "\n" + "=" * 60,
+        "RAG MCP Integration Example Complete!",
+        "=" * 60,
+        "\n📚 Next Steps:",
+        "1. Index some documents in your RAG service",
+        "2. Set up environment variables for LLM access",
+        "3. Use the RAG agent in your applications",
+        "4. Explore multi-configuration retrieval for complex queries",
+    ]))
 
 if __name__ == "__main__":
+    # Use the libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -2,7 +2,7 @@ import logging
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import settings
@@ -20,8 +20,8 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting Agent Platform")
-    logger.info(f"Debug mode: {settings.DEBUG}")
-    logger.info(f"Storage path: {settings.STORAGE_PATH}")
+    logger.info("Debug mode: %s", settings.DEBUG)
+    logger.info("Storage path: %s", settings.STORAGE_PATH)
     
     yield
     
@@ -33,16 +33,18 @@ app = FastAPI(
     title="Agent Platform",
     description="A platform for creating, managing, and executing AI agents using LangGraph, FastAPI, and CopilotKit",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
+# Add CORS middleware. Explicit allowlists let Starlette precompute the
+# preflight headers once instead of reflecting them on every request.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials="*" not in settings.CORS_ORIGINS,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Accept", "Accept-Language", "Authorization", "Content-Language", "Content-Type"],
 )
 
 # Add API routes
@@ -51,8 +53,8 @@ app.include_router(router, prefix="/api/v1")
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception: {str(exc)}")
-    return JSONResponse(
+    logger.error("Global exception: %s", exc)
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -85,6 +87,8 @@ if __name__ == "__main__":
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
+        # reload and workers are mutually exclusive in uvicorn
         reload=settings.DEBUG,
+        workers=None if settings.DEBUG else settings.WORKERS,
         log_level="info" if not settings.DEBUG else "debug"
     )
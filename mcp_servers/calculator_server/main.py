@@ -1,14 +1,25 @@
+import ast
 import math
 import logging
-from typing import Dict, Any
+import sys
+from collections import Counter
+from functools import lru_cache
+from statistics import median as stdlib_median
+from typing import Dict, Any, List
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
+try:
+    import numpy as np
+except ImportError:  # Statistics fall back to a single pure-Python pass
+    np = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Calculator MCP Server", version="1.0.0")
+app = FastAPI(title="Calculator MCP Server", version="1.0.0", default_response_class=ORJSONResponse)
 
 class ToolRequest(BaseModel):
     arguments: Dict[str, Any]
@@ -138,36 +149,60 @@ async def get_resources():
         ]
     }
 
+# Allowed names for eval
+ALLOWED_NAMES = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "pow": pow,
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "pi": math.pi,
+    "e": math.e,
+}
+
+EVAL_GLOBALS = {"__builtins__": {}, **ALLOWED_NAMES}
+
+# Syntax nodes an expression may contain; anything else (attributes, subscripts,
+# lambdas, comprehensions, assignments, ...) is rejected before compiling
+ALLOWED_NODES = frozenset({
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Call,
+    ast.Tuple, ast.List, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+})
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str):
+    """Validate an expression against the syntax whitelist and compile it once"""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {str(e)}")
+    
+    for node in ast.walk(tree):
+        if type(node) not in ALLOWED_NODES:
+            raise ValueError(f"Unsupported operation: {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES:
+            raise ValueError(f"Unknown name: {node.id}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+    
+    return compile(tree, "<calc>", "eval")
+
 def safe_eval(expression: str) -> float:
     """Safely evaluate a mathematical expression"""
-    # Define allowed names for eval
-    allowed_names = {
-        "__builtins__": {},
-        "abs": abs,
-        "round": round,
-        "min": min,
-        "max": max,
-        "sum": sum,
-        "pow": pow,
-        "sqrt": math.sqrt,
-        "sin": math.sin,
-        "cos": math.cos,
-        "tan": math.tan,
-        "log": math.log,
-        "log10": math.log10,
-        "exp": math.exp,
-        "pi": math.pi,
-        "e": math.e,
-    }
-    
-    # Remove any potentially dangerous characters/functions
-    dangerous = ["import", "exec", "eval", "__", "open", "file", "input", "raw_input"]
-    for danger in dangerous:
-        if danger in expression.lower():
-            raise ValueError(f"Dangerous operation detected: {danger}")
+    code = compile_expression(expression)
     
     try:
-        result = eval(expression, allowed_names)
+        result = eval(code, EVAL_GLOBALS)
         return float(result)
     except Exception as e:
         raise ValueError(f"Invalid expression: {str(e)}")
@@ -192,6 +227,55 @@ async def calculate(request: ToolRequest) -> ToolResponse:
         logger.error(f"Error calculating: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+DEG_TO_RAD = math.pi / 180
+
+def sqrt_operation(value: float, base: float) -> float:
+    """Square root, rejecting negative input"""
+    if value < 0:
+        raise ValueError("Cannot calculate square root of negative number")
+    return math.sqrt(value)
+
+def log_operation(value: float, base: float) -> float:
+    """Logarithm in the given base, rejecting non-positive input"""
+    if value <= 0:
+        raise ValueError("Cannot calculate logarithm of non-positive number")
+    return math.log(value, base)
+
+def ln_operation(value: float, base: float) -> float:
+    """Natural logarithm, rejecting non-positive input"""
+    if value <= 0:
+        raise ValueError("Cannot calculate natural logarithm of non-positive number")
+    return math.log(value)
+
+# 1558! is the largest factorial within Python's default 4300-digit int-to-str
+# limit; larger results cannot be formatted, so they are not worth caching
+MAX_CACHED_FACTORIAL = 1558
+
+@lru_cache(maxsize=MAX_CACHED_FACTORIAL + 1)
+def cached_factorial(n: int) -> int:
+    """Memoized factorial of a formattable input"""
+    return math.factorial(n)
+
+def factorial_operation(value: float, base: float) -> int:
+    """Factorial of a non-negative integer"""
+    if value < 0 or value != int(value):
+        raise ValueError("Factorial requires non-negative integer")
+    n = int(value)
+    return cached_factorial(n) if n <= MAX_CACHED_FACTORIAL else math.factorial(n)
+
+# Operation name -> callable(value, base); trigonometric inputs are in degrees
+MATH_OPERATIONS = {
+    "sqrt": sqrt_operation,
+    "sin": lambda value, base: math.sin(value * DEG_TO_RAD),
+    "cos": lambda value, base: math.cos(value * DEG_TO_RAD),
+    "tan": lambda value, base: math.tan(value * DEG_TO_RAD),
+    "log": log_operation,
+    "ln": ln_operation,
+    "exp": lambda value, base: math.exp(value),
+    "factorial": factorial_operation,
+    "power": lambda value, base: math.pow(value, base),
+}
+
 @app.post("/tools/advanced_math")
 async def advanced_math(request: ToolRequest) -> ToolResponse:
     """Perform advanced mathematical operations"""
@@ -203,37 +287,12 @@ async def advanced_math(request: ToolRequest) -> ToolResponse:
         if not operation or value is None:
             raise HTTPException(status_code=400, detail="Operation and value are required")
         
-        result = None
-        
-        if operation == "sqrt":
-            if value < 0:
-                raise ValueError("Cannot calculate square root of negative number")
-            result = math.sqrt(value)
-        elif operation == "sin":
-            result = math.sin(math.radians(value))
-        elif operation == "cos":
-            result = math.cos(math.radians(value))
-        elif operation == "tan":
-            result = math.tan(math.radians(value))
-        elif operation == "log":
-            if value <= 0:
-                raise ValueError("Cannot calculate logarithm of non-positive number")
-            result = math.log(value, base)
-        elif operation == "ln":
-            if value <= 0:
-                raise ValueError("Cannot calculate natural logarithm of non-positive number")
-            result = math.log(value)
-        elif operation == "exp":
-            result = math.exp(value)
-        elif operation == "factorial":
-            if value < 0 or value != int(value):
-                raise ValueError("Factorial requires non-negative integer")
-            result = math.factorial(int(value))
-        elif operation == "power":
-            result = math.pow(value, base)
-        else:
+        operation_fn = MATH_OPERATIONS.get(operation)
+        if operation_fn is None:
             raise ValueError(f"Unknown operation: {operation}")
         
+        result = operation_fn(value, base)
+        
         response_text = f"Operation: {operation}({value}" + (f", {base}" if operation in ["log", "power"] else "") + f")\nResult: {result}"
         
         logger.info(f"Advanced math: {operation}({value}) = {result}")
@@ -243,6 +302,101 @@ async def advanced_math(request: ToolRequest) -> ToolResponse:
         logger.error(f"Error in advanced math: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+# Measures derived from the single summary pass over the numbers
+SUMMARY_MEASURES = frozenset({"mean", "std", "var", "min", "max", "sum"})
+
+def summarize_list(numbers: List[float]) -> Dict[str, float]:
+    """Mean, population variance, min, max and sum in one pass (Welford's algorithm)"""
+    n = 0
+    total = 0
+    mean = 0.0
+    m2 = 0.0
+    lowest = highest = numbers[0]
+    for x in numbers:
+        n += 1
+        total += x
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        if x < lowest:
+            lowest = x
+        elif x > highest:
+            highest = x
+    return {"mean": total / n, "var": m2 / n, "min": lowest, "max": highest, "sum": total}
+
+if np is not None:
+    INT64_LIMIT = 2 ** 63
+
+    def prepare_numbers(numbers: List[float]):
+        """Convert to an array when NumPy reproduces the exact results, else keep the list
+
+        Only all-float input, or all-int input whose sum fits in int64, is
+        converted; mixed, boolean and big-int input keeps its Python types.
+        """
+        kinds = set(map(type, numbers))
+        if kinds == {float}:
+            return np.asarray(numbers, dtype=np.float64)
+        if kinds == {int}:
+            data = np.asarray(numbers)
+            if data.dtype == np.int64 and len(data) * max(-int(data.min()), int(data.max())) < INT64_LIMIT:
+                return data
+        return numbers
+    
+    def summarize_array(data) -> Dict[str, float]:
+        """Mean, population variance, min, max and sum of an array"""
+        return {
+            "mean": float(data.mean()),
+            "var": float(data.var()),
+            "min": data.min().item(),
+            "max": data.max().item(),
+            "sum": data.sum().item()
+        }
+    
+    def median_of_array(data) -> float:
+        """Median via partial selection rather than a full sort"""
+        n = len(data)
+        mid = n // 2
+        if n % 2:
+            return np.partition(data, mid)[mid].item()
+        lower, upper = np.partition(data, (mid - 1, mid))[mid - 1:mid + 1]
+        return float((lower + upper) / 2)
+    
+    def summarize_numbers(data) -> Dict[str, float]:
+        """Summary of the prepared numbers, vectorized when they were converted"""
+        return summarize_list(data) if isinstance(data, list) else summarize_array(data)
+    
+    def median_of(data) -> float:
+        """Median of the prepared numbers, vectorized when they were converted"""
+        return stdlib_median(data) if isinstance(data, list) else median_of_array(data)
+else:
+    def prepare_numbers(numbers: List[float]):
+        """Numbers are used as-is without NumPy"""
+        return numbers
+    
+    summarize_numbers = summarize_list
+    median_of = stdlib_median
+
+def mode_of(numbers: List[float]):
+    """Most common value, or every tied value"""
+    counts = Counter(numbers)
+    max_count = max(counts.values())
+    modes = [k for k, v in counts.items() if v == max_count]
+    return modes[0] if len(modes) == 1 else modes
+
+# Measure name -> callable(numbers, data, summary), in the order results are
+# reported. Variance and std are population measures (ddof=0).
+STAT_MEASURES = {
+    "mean": lambda numbers, data, summary: summary["mean"],
+    "median": lambda numbers, data, summary: median_of(data),
+    "mode": lambda numbers, data, summary: mode_of(numbers),
+    "std": lambda numbers, data, summary: math.sqrt(summary["var"]),
+    "var": lambda numbers, data, summary: summary["var"],
+    "min": lambda numbers, data, summary: summary["min"],
+    "max": lambda numbers, data, summary: summary["max"],
+    "sum": lambda numbers, data, summary: summary["sum"],
+    "count": lambda numbers, data, summary: len(numbers),
+}
+
 @app.post("/tools/statistics")
 async def statistics(request: ToolRequest) -> ToolResponse:
     """Calculate statistical measures"""
@@ -256,46 +410,15 @@ async def statistics(request: ToolRequest) -> ToolResponse:
         if not isinstance(numbers, list) or not all(isinstance(x, (int, float)) for x in numbers):
             raise HTTPException(status_code=400, detail="Numbers must be a list of numeric values")
         
-        results = {}
-        
-        if "mean" in measures:
-            results["mean"] = sum(numbers) / len(numbers)
-        
-        if "median" in measures:
-            sorted_nums = sorted(numbers)
-            n = len(sorted_nums)
-            if n % 2 == 0:
-                results["median"] = (sorted_nums[n//2 - 1] + sorted_nums[n//2]) / 2
-            else:
-                results["median"] = sorted_nums[n//2]
+        requested = frozenset(measures)
+        data = prepare_numbers(numbers)
+        summary = summarize_numbers(data) if SUMMARY_MEASURES & requested else None
         
-        if "mode" in measures:
-            from collections import Counter
-            counts = Counter(numbers)
-            max_count = max(counts.values())
-            modes = [k for k, v in counts.items() if v == max_count]
-            results["mode"] = modes[0] if len(modes) == 1 else modes
-        
-        if "std" in measures:
-            mean = sum(numbers) / len(numbers)
-            variance = sum((x - mean) ** 2 for x in numbers) / len(numbers)
-            results["std"] = math.sqrt(variance)
-        
-        if "var" in measures:
-            mean = sum(numbers) / len(numbers)
-            results["var"] = sum((x - mean) ** 2 for x in numbers) / len(numbers)
-        
-        if "min" in measures:
-            results["min"] = min(numbers)
-        
-        if "max" in measures:
-            results["max"] = max(numbers)
-        
-        if "sum" in measures:
-            results["sum"] = sum(numbers)
-        
-        if "count" in measures:
-            results["count"] = len(numbers)
+        results = {
+            name: measure(numbers, data, summary)
+            for name, measure in STAT_MEASURES.items()
+            if name in requested
+        }
         
         response_lines = [f"Statistics for {len(numbers)} numbers:"]
         for measure, value in results.items():
@@ -333,14 +456,44 @@ CONVERSION_FACTORS = {
     }
 }
 
+TEMPERATURE_UNITS = ("c", "f", "k", "celsius", "fahrenheit", "kelvin")
+
+# Canonical interned form of every known category and unit, keyed by the common
+# spellings, so most requests resolve without allocating a lowercased copy
+CANONICAL_NAMES = {
+    spelling: canonical
+    for canonical in map(sys.intern, (
+        *CONVERSION_FACTORS,
+        *TEMPERATURE_UNITS,
+        *(unit for factors in CONVERSION_FACTORS.values() for unit in factors)
+    ))
+    for spelling in (canonical, canonical.upper(), canonical.capitalize())
+}
+
+def canonical_name(name: str) -> str:
+    """Resolve a unit or category name to its canonical lowercase form"""
+    canonical = CANONICAL_NAMES.get(name)
+    if canonical is None:
+        lowered = name.lower()
+        canonical = CANONICAL_NAMES.get(lowered, lowered)
+    return canonical
+
+# Precomputed from/to ratios so a conversion is a single lookup and multiply
+CONVERSION_RATIOS = {
+    (category, from_unit, to_unit): from_factor / to_factor
+    for category, factors in CONVERSION_FACTORS.items()
+    for from_unit, from_factor in factors.items()
+    for to_unit, to_factor in factors.items()
+}
+
 @app.post("/tools/unit_conversion")
 async def unit_conversion(request: ToolRequest) -> ToolResponse:
     """Convert between different units"""
     try:
         value = request.arguments.get("value")
-        from_unit = request.arguments.get("from_unit", "").lower()
-        to_unit = request.arguments.get("to_unit", "").lower()
-        category = request.arguments.get("category", "length").lower()
+        from_unit = canonical_name(request.arguments.get("from_unit", ""))
+        to_unit = canonical_name(request.arguments.get("to_unit", ""))
+        category = canonical_name(request.arguments.get("category", "length"))
         
         if value is None or not from_unit or not to_unit:
             raise HTTPException(status_code=400, detail="Value, from_unit, and to_unit are required")
@@ -349,19 +502,15 @@ async def unit_conversion(request: ToolRequest) -> ToolResponse:
             # Special handling for temperature
             result = convert_temperature(value, from_unit, to_unit)
         else:
-            if category not in CONVERSION_FACTORS:
-                raise ValueError(f"Unknown category: {category}")
-            
-            factors = CONVERSION_FACTORS[category]
+            ratio = CONVERSION_RATIOS.get((category, from_unit, to_unit))
             
-            if from_unit not in factors:
-                raise ValueError(f"Unknown unit '{from_unit}' for category '{category}'")
-            if to_unit not in factors:
-                raise ValueError(f"Unknown unit '{to_unit}' for category '{category}'")
+            if ratio is None:
+                if category not in CONVERSION_FACTORS:
+                    raise ValueError(f"Unknown category: {category}")
+                bad_unit = from_unit if from_unit not in CONVERSION_FACTORS[category] else to_unit
+                raise ValueError(f"Unknown unit '{bad_unit}' for category '{category}'")
             
-            # Convert to base unit, then to target unit
-            base_value = value * factors[from_unit]
-            result = base_value / factors[to_unit]
+            result = value * ratio
         
         response_text = f"Conversion: {value} {from_unit} = {result} {to_unit}"
         
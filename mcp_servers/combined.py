@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Serve all MCP servers from a single process
+
+Each server is mounted under its own prefix (e.g. http://localhost:8002/weather),
+so one interpreter and event loop serve the whole stack. Point each server's
+configured url at its mount to use this instead of one process per server.
+
+Always runs as a single process: the memory server keeps its store, indexes
+and write-ahead log writer in process memory, so several workers would each
+see different memories and overwrite each other's snapshot and log files.
+
+Environment variables:
+    MCP_COMBINED_PORT: Port to listen on (default: 8002)
+"""
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI
+
+# Make the server packages importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weather_server.main import app as weather_app
+from memory_server.main import app as memory_app
+from calculator_server.main import app as calculator_app
+from rag_server.main import app as rag_app
+
+COMBINED_PORT = int(os.getenv("MCP_COMBINED_PORT", "8002"))
+
+MOUNTED_APPS = {
+    "weather": weather_app,
+    "memory": memory_app,
+    "calculator": calculator_app,
+    "rag": rag_app
+}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run each mounted server's lifespan, which Starlette does not do for mounts"""
+    async with AsyncExitStack() as stack:
+        for sub_app in MOUNTED_APPS.values():
+            await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+        yield
+
+app = FastAPI(title="Combined MCP Servers", version="1.0.0", lifespan=lifespan)
+
+for name, sub_app in MOUNTED_APPS.items():
+    app.mount(f"/{name}", sub_app)
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "healthy", "server": "combined-mcp", "servers": list(MOUNTED_APPS)}
+
+def run():
+    """Serve all MCP servers from this process"""
+    import uvicorn
+    
+    print(f"Starting combined MCP servers on http://localhost:{COMBINED_PORT}")
+    for name in MOUNTED_APPS:
+        print(f"- {name.capitalize()} Server: http://localhost:{COMBINED_PORT}/{name}")
+    uvicorn.run(app, host="0.0.0.0", port=COMBINED_PORT, log_level="info")
+
+if __name__ == "__main__":
+    run()
@@ -1,17 +1,19 @@
-import json
+import asyncio
 import logging
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Memory MCP Server", version="1.0.0")
-
 class ToolRequest(BaseModel):
     arguments: Dict[str, Any]
 
@@ -26,31 +28,190 @@ memory_store = {
     "entities": {}
 }
 
-# Storage file for persistence
+# Storage file for persistence. Mutations are appended to a write-ahead log and
+# folded into the snapshot periodically, so a write costs one record, not the store.
+# The store and log writer live in this process, so the server must run as a
+# single process; several workers would clobber each other's snapshot and log.
 STORAGE_FILE = Path("memory_storage.json")
+LOG_FILE = STORAGE_FILE.with_suffix(".log")
+SNAPSHOT_INTERVAL = float(os.getenv("MEMORY_SNAPSHOT_INTERVAL", "60"))
+
+log_file = None
+pending_ops = 0
+
+# While the app is running, log records and snapshots are handed to a single
+# writer task that does the file I/O in a worker thread, off the event loop
+log_queue: asyncio.Queue = None
+SNAPSHOT = object()
+STOP = object()
+
+def apply_log_entry(entry: Dict[str, Any]):
+    """Apply a single write-ahead log record to the in-memory store"""
+    if entry["op"] == "set":
+        memory_store["memories"][entry["key"]] = entry["value"]
+    elif entry["op"] == "delete":
+        memory_store["memories"].pop(entry["key"], None)
 
 def load_memory():
-    """Load memory from storage file"""
+    """Load the last snapshot and replay the write-ahead log over it"""
     global memory_store
+    replayed = 0
     try:
         if STORAGE_FILE.exists():
-            with open(STORAGE_FILE, 'r') as f:
-                memory_store = json.load(f)
-            logger.info("Loaded memory from storage")
+            with open(STORAGE_FILE, 'rb') as f:
+                memory_store = orjson.loads(f.read())
+        if LOG_FILE.exists():
+            with open(LOG_FILE, 'rb') as f:
+                for line in f:
+                    try:
+                        apply_log_entry(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        logger.warning("Ignoring truncated write-ahead log record")
+                        break
+                    replayed += 1
+        logger.info(f"Loaded memory from storage ({replayed} log records replayed)")
     except Exception as e:
         logger.error(f"Error loading memory: {str(e)}")
+    
+    # Fold the replayed log into a fresh snapshot so it starts out empty
+    if replayed:
+        save_memory()
+
+def append_log(op: str, key: str, value: Dict[str, Any] = None):
+    """Record a mutation in the write-ahead log"""
+    global pending_ops
+    record = orjson.dumps({"op": op, "key": key, "value": value}, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    pending_ops += 1
+    if log_queue is not None:
+        log_queue.put_nowait(record)
+    else:
+        write_log_records([record])
 
-def save_memory():
-    """Save memory to storage file"""
+def write_log_records(records: List[bytes]):
+    """Append records to the write-ahead log"""
+    global log_file
     try:
-        with open(STORAGE_FILE, 'w') as f:
-            json.dump(memory_store, f, indent=2, default=str)
+        if log_file is None:
+            log_file = open(LOG_FILE, 'ab')
+        log_file.write(b"".join(records))
+        log_file.flush()
+    except Exception as e:
+        logger.error(f"Error writing memory log: {str(e)}")
+
+def save_memory(state: Dict[str, Any] = None):
+    """Write a consolidated snapshot of memory and truncate the write-ahead log"""
+    try:
+        tmp_file = STORAGE_FILE.with_suffix(".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(memory_store if state is None else state, default=str))
+        os.replace(tmp_file, STORAGE_FILE)
+        
+        if log_file is not None:
+            log_file.truncate(0)
+        elif LOG_FILE.exists():
+            LOG_FILE.unlink()
         logger.info("Saved memory to storage")
     except Exception as e:
         logger.error(f"Error saving memory: {str(e)}")
 
+async def log_writer():
+    """Drain the log queue, batching pending records into a single write"""
+    global pending_ops
+    while True:
+        batch = [await log_queue.get()]
+        while not log_queue.empty():
+            batch.append(log_queue.get_nowait())
+        
+        records = []
+        for item in batch:
+            if isinstance(item, bytes):
+                records.append(item)
+                continue
+            
+            if records:
+                await asyncio.to_thread(write_log_records, records)
+                records = []
+            # Snapshot a shallow copy: handlers replace memory entries rather than
+            # mutating them, and any record queued after this point replays cleanly
+            if pending_ops:
+                state = {name: dict(section) for name, section in memory_store.items()}
+                pending_ops = 0
+                await asyncio.to_thread(save_memory, state)
+            if item is STOP:
+                return
+        
+        if records:
+            await asyncio.to_thread(write_log_records, records)
+
+# Secondary index of memory keys per category, so category filters and stats only
+# touch matching memories. Dicts are used as insertion-ordered sets.
+category_index: Dict[str, Dict[str, None]] = {}
+
+# Lowercased (key, content) per memory, so searches don't re-lowercase every record
+search_index: Dict[str, Tuple[str, str]] = {}
+
+def index_memory(key: str, memory: Dict[str, Any]):
+    """Add a memory to the category and search indexes"""
+    category_index.setdefault(memory["category"], {})[key] = None
+    search_index[key] = (key.lower(), memory["content"].lower())
+
+def unindex_memory(key: str, memory: Dict[str, Any]):
+    """Remove a memory from the category and search indexes"""
+    keys = category_index.get(memory["category"])
+    if keys is not None:
+        keys.pop(key, None)
+        if not keys:
+            del category_index[memory["category"]]
+    search_index.pop(key, None)
+
+def reindex_memory(key: str, previous: Dict[str, Any], memory: Dict[str, Any]):
+    """Update the indexes for a replaced memory, keeping its place in store order"""
+    category = memory["category"]
+    if previous["category"] != category:
+        unindex_memory(key, previous)
+        # The key keeps its position in the store, so place it among the new
+        # category's keys in that order, as filtering the store would
+        keys = category_index.get(category, {})
+        category_index[category] = {k: None for k in memory_store["memories"] if k == key or k in keys}
+    search_index[key] = (key.lower(), memory["content"].lower())
+
+def rebuild_indexes():
+    """Rebuild the category and search indexes from the loaded memories"""
+    category_index.clear()
+    search_index.clear()
+    for key, memory in memory_store["memories"].items():
+        index_memory(key, memory)
+
+async def snapshot_loop():
+    """Periodically fold the write-ahead log into the snapshot"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        if pending_ops:
+            log_queue.put_nowait(SNAPSHOT)
+
 # Load memory on startup
 load_memory()
+rebuild_indexes()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the log writer and snapshot loop, taking a final snapshot on shutdown"""
+    global log_queue
+    log_queue = asyncio.Queue()
+    writer_task = asyncio.create_task(log_writer())
+    snapshot_task = asyncio.create_task(snapshot_loop())
+    yield
+    snapshot_task.cancel()
+    log_queue.put_nowait(STOP)
+    await writer_task
+    log_queue = None
+
+app = FastAPI(
+    title="Memory MCP Server",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 @app.get("/health")
 async def health_check():
@@ -180,14 +341,21 @@ async def store_memory(request: ToolRequest) -> ToolResponse:
         if not key or not content:
             raise HTTPException(status_code=400, detail="Key and content are required")
         
-        memory_store["memories"][key] = {
+        now = datetime.now().isoformat()
+        memory = {
             "content": content,
             "category": category,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now,
+            "updated_at": now
         }
+        previous = memory_store["memories"].get(key)
+        memory_store["memories"][key] = memory
+        if previous:
+            reindex_memory(key, previous, memory)
+        else:
+            index_memory(key, memory)
         
-        save_memory()
+        append_log("set", key, memory)
         
         result = f"Memory stored successfully with key: {key}"
         logger.info(f"Stored memory: {key}")
@@ -229,21 +397,22 @@ async def search_memories(request: ToolRequest) -> ToolResponse:
         limit = request.arguments.get("limit", 10)
         
         results = []
+        memories = memory_store["memories"]
         
-        for key, memory in memory_store["memories"].items():
-            # Filter by category if specified
-            if category and memory["category"] != category:
-                continue
+        # Filter by category if specified, visiting only that category's memories
+        keys = category_index.get(category, {}) if category else memories
+        for key in keys:
+            # Stop as soon as the limit is reached
+            if len(results) >= limit:
+                break
             
             # Search in content and key
             if query:
-                if query in memory["content"].lower() or query in key.lower():
-                    results.append((key, memory))
+                lower_key, lower_content = search_index[key]
+                if query in lower_content or query in lower_key:
+                    results.append((key, memories[key]))
             else:
-                results.append((key, memory))
-        
-        # Limit results
-        results = results[:limit]
+                results.append((key, memories[key]))
         
         if not results:
             return ToolResponse(content="No memories found matching the search criteria")
@@ -270,7 +439,7 @@ async def list_memories(request: ToolRequest) -> ToolResponse:
         memories = memory_store["memories"]
         
         if category:
-            memories = {k: v for k, v in memories.items() if v["category"] == category}
+            memories = {k: memories[k] for k in category_index.get(category, {})}
         
         if not memories:
             return ToolResponse(content="No memories found")
@@ -300,8 +469,9 @@ async def delete_memory(request: ToolRequest) -> ToolResponse:
         if key not in memory_store["memories"]:
             return ToolResponse(content=f"No memory found with key: {key}")
         
-        del memory_store["memories"][key]
-        save_memory()
+        memory = memory_store["memories"].pop(key)
+        unindex_memory(key, memory)
+        append_log("delete", key)
         
         result = f"Memory deleted successfully: {key}"
         logger.info(f"Deleted memory: {key}")
@@ -315,11 +485,7 @@ async def delete_memory(request: ToolRequest) -> ToolResponse:
 async def get_memory_stats():
     """Get memory statistics"""
     memories = memory_store["memories"]
-    categories = {}
-    
-    for memory in memories.values():
-        category = memory["category"]
-        categories[category] = categories.get(category, 0) + 1
+    categories = {category: len(keys) for category, keys in category_index.items()}
     
     stats = {
         "total_memories": len(memories),
@@ -328,18 +494,15 @@ async def get_memory_stats():
     }
     
     return {
-        "content": json.dumps(stats, indent=2),
+        "content": orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode(),
         "mimeType": "application/json"
     }
 
 @app.get("/resources/memory://categories")
 async def get_memory_categories():
     """Get list of memory categories"""
-    memories = memory_store["memories"]
-    categories = set(memory["category"] for memory in memories.values())
-    
     return {
-        "content": f"Memory categories: {', '.join(sorted(categories))}",
+        "content": f"Memory categories: {', '.join(sorted(category_index))}",
         "mimeType": "text/plain"
     }
 
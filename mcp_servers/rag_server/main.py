@@ -1,36 +1,271 @@
 import os
+import time
+import hashlib
+import heapq
+import asyncio
 import httpx
 import logging
-import json
+import orjson
+from cachetools import TTLCache
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from typing import Dict, Any, List, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter, field_validator
+
+try:
+    import numpy as np
+except ImportError:  # Fusion falls back to the pure-Python scoring loop
+    np = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="RAG Retrieval MCP Server", version="1.0.0")
-
 class ToolRequest(BaseModel):
     arguments: Dict[str, Any]
 
-class ToolResponse(BaseModel):
-    content: str
-    success: bool = True
-
 # RAG service configuration
 RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://localhost:9000")
 RAG_API_BASE = f"{RAG_SERVICE_URL}/api/v1"
 
+# Maximum number of concurrent requests to the RAG service; callers beyond this
+# wait for a free slot instead of piling onto the upstream
+UPSTREAM_CONCURRENCY = int(os.getenv("RAG_UPSTREAM_CONCURRENCY", "20"))
+
+# Recently formatted tool responses, keyed by tool name and arguments. Generated
+# answers may differ between calls, so they are only reused briefly.
+RETRIEVAL_CACHE = TTLCache(maxsize=512, ttl=float(os.getenv("RAG_CACHE_TTL", "60")))
+GENERATION_CACHE = TTLCache(maxsize=128, ttl=float(os.getenv("RAG_GENERATION_CACHE_TTL", "10")))
+
+def cache_key(tool_name: str, args: Dict[str, Any]) -> bytes:
+    """Stable digest of a tool call's name and arguments"""
+    return hashlib.blake2b(
+        orjson.dumps([tool_name, args], option=orjson.OPT_SORT_KEYS),
+        digest_size=16
+    ).digest()
+
+# Only this much of each document is shown, so retrieval requests ask the RAG
+# service to truncate content before sending it. /query is not sent the hint,
+# since the service may apply it to the context used for generation.
+MAX_CONTENT_CHARS = 200
+MAX_SOURCE_CHARS = 150
+
+class RetrievedDoc(BaseModel):
+    """The fields of a retrieved document that tool responses show
+
+    Validation is lenient so that any document the RAG service returns can be
+    formatted: scores are shown as given, content is coerced to text and
+    metadata that is not an object is ignored.
+    """
+    content: str = ""
+    similarity_score: Any = "N/A"
+    metadata: Optional[Dict[str, Any]] = None
+    rrf_score: Any = None
+    source_configuration: Any = None
+
+    @field_validator("content", mode="before")
+    @classmethod
+    def content_as_text(cls, value: Any) -> str:
+        return "" if value is None else str(value)
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def metadata_as_dict(cls, value: Any) -> Optional[Dict[str, Any]]:
+        return value if isinstance(value, dict) else None
+
+# Documents are validated in one pass by pydantic-core, then read as attributes
+RETRIEVED_DOCS = TypeAdapter(List[RetrievedDoc])
+
+def format_document(i: int, doc: RetrievedDoc) -> str:
+    """Format one retrieved document for a tool response"""
+    metadata = doc.metadata or {}
+    line = f"\n{i}. Score: {doc.similarity_score}\n   Content: {doc.content[:MAX_CONTENT_CHARS]}..."
+    if metadata.get("source"):
+        line += f"\n   Source: {metadata['source']}"
+    if metadata.get("page"):
+        line += f"\n   Page: {metadata['page']}"
+    return line
+
+def format_fused_document(i: int, doc: RetrievedDoc) -> str:
+    """Format one document from a multi-configuration retrieval"""
+    line = f"\n{i}. Score: {doc.similarity_score}"
+    if doc.rrf_score:
+        line += f"\n   RRF Score: {doc.rrf_score}"
+    if doc.source_configuration:
+        line += f"\n   Source Config: {doc.source_configuration}"
+    return f"{line}\n   Content: {doc.content[:MAX_CONTENT_CHARS]}..."
+
+def format_source(i: int, source: RetrievedDoc) -> str:
+    """Format one source document of a generated answer"""
+    line = f"\n{i}. Score: {source.similarity_score}\n   Content: {source.content[:MAX_SOURCE_CHARS]}..."
+    if (source.metadata or {}).get("source"):
+        line += f"\n   Source: {source.metadata['source']}"
+    return line
+
+def format_retrieve_response(result: Dict[str, Any], query: str) -> str:
+    """Format a single-configuration retrieval result"""
+    documents = RETRIEVED_DOCS.validate_python(result.get("documents", []))
+    if not documents:
+        return f"No relevant documents found for query: '{query}'"
+    return "\n".join([
+        f"Found {result.get('total_found', 0)} relevant documents for query: '{query}'",
+        f"Configuration: {result.get('configuration_name', 'unknown')}",
+        f"Processing time: {result.get('processing_time', 0):.3f}s",
+        "",
+        "Documents:",
+        *map(format_document, range(1, len(documents) + 1), documents)
+    ])
+
+def format_multi_config_response(result: Dict[str, Any], query: str, configuration_names: List[str]) -> str:
+    """Format a fused multi-configuration retrieval result"""
+    documents = RETRIEVED_DOCS.validate_python(result.get("documents", []))
+    if not documents:
+        return f"No relevant documents found for query: '{query}'"
+    return "\n".join([
+        f"Found {result.get('total_found', 0)} relevant documents for query: '{query}'",
+        f"Configurations: {', '.join(configuration_names)}",
+        f"Fusion method: {result.get('fusion_method', 'unknown')}",
+        f"Processing time: {result.get('processing_time', 0):.3f}s",
+        "",
+        "Documents:",
+        *map(format_fused_document, range(1, len(documents) + 1), documents)
+    ])
+
+def format_generation_response(result: Dict[str, Any], query: str) -> str:
+    """Format a generated answer and its sources"""
+    sources = RETRIEVED_DOCS.validate_python(result.get("sources", []))
+    return "\n".join([
+        f"Query: {query}",
+        f"Configuration: {result.get('configuration_name', 'unknown')}",
+        f"Processing time: {result.get('processing_time', 0):.3f}s",
+        "",
+        f"Answer: {result.get('answer', 'No answer generated')}",
+        "",
+        f"Sources ({len(sources)}):",
+        *map(format_source, range(1, len(sources) + 1), sources)
+    ])
+
+# Responses with more documents than this are formatted in a worker thread so
+# the event loop keeps serving other requests; smaller ones are cheaper inline
+FORMAT_OFFLOAD_THRESHOLD = int(os.getenv("RAG_FORMAT_OFFLOAD_THRESHOLD", "20"))
+
+async def format_off_loop(count: int, formatter, *args) -> str:
+    """Run a response formatter, off the event loop when the response is large"""
+    if count > FORMAT_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(formatter, *args)
+    return formatter(*args)
+
+# Request bodies are serialized with orjson and sent as raw content
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+@asynccontextmanager
+async def upstream_slot():
+    """Hold one of the bounded upstream request slots"""
+    async with app.state.upstream_semaphore:
+        app.state.upstream_in_flight += 1
+        try:
+            yield
+        finally:
+            app.state.upstream_in_flight -= 1
+
+# Keep-alive covers the concurrency limit so every upstream slot can reuse a warm
+# connection; failed connection attempts are retried once by the transport
+UPSTREAM_LIMITS = httpx.Limits(
+    max_connections=max(64, UPSTREAM_CONCURRENCY),
+    max_keepalive_connections=max(32, UPSTREAM_CONCURRENCY),
+    keepalive_expiry=60
+)
+
+def upstream_timeout(read: float) -> httpx.Timeout:
+    """Per-call timeout that fails fast when connecting or waiting for the pool"""
+    return httpx.Timeout(read, connect=2.0, write=10.0, pool=2.0)
+
+# Upstream POSTs currently in flight, keyed like the response caches, so that
+# concurrent identical requests share one call instead of each issuing their own
+INFLIGHT_REQUESTS: Dict[bytes, asyncio.Future] = {}
+
+async def post_json(path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """POST a JSON payload to the RAG service, coalescing identical concurrent requests"""
+    key = cache_key(path, payload)
+    request = INFLIGHT_REQUESTS.get(key)
+    if request is None:
+        request = asyncio.ensure_future(fetch_json(path, payload, timeout))
+        INFLIGHT_REQUESTS[key] = request
+        request.add_done_callback(lambda _: INFLIGHT_REQUESTS.pop(key, None))
+    # Shielded so a caller that goes away does not cancel the request for the
+    # others; the parsed result is shared, so callers must not modify it
+    return await asyncio.shield(request)
+
+async def fetch_json(path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """POST a JSON payload to the RAG service and parse the streamed response body"""
+    # Streaming keeps the raw body scoped to this call, so it is released as soon
+    # as it has been parsed instead of living on alongside the parsed documents
+    async with upstream_slot(), app.state.rag_client.stream(
+        "POST",
+        path,
+        content=orjson.dumps(payload),
+        headers=JSON_HEADERS,
+        timeout=upstream_timeout(timeout)
+    ) as response:
+        response.raise_for_status()
+        return orjson.loads(await response.aread())
+
+async def get_upstream(path: str, timeout: float, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+    """GET from the RAG service within the upstream concurrency limit"""
+    async with upstream_slot():
+        return await app.state.rag_client.get(path, params=params, timeout=upstream_timeout(timeout))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled client to the RAG service across all requests"""
+    # HTTP/2 is negotiated over TLS, letting concurrent calls multiplex one connection
+    app.state.rag_transport = httpx.AsyncHTTPTransport(retries=1, http2=True, limits=UPSTREAM_LIMITS)
+    app.state.rag_client = httpx.AsyncClient(
+        base_url=RAG_API_BASE,
+        transport=app.state.rag_transport,
+        timeout=upstream_timeout(30.0)
+    )
+    app.state.upstream_semaphore = asyncio.Semaphore(UPSTREAM_CONCURRENCY)
+    app.state.upstream_in_flight = 0
+    try:
+        yield
+    finally:
+        await app.state.rag_client.aclose()
+
+# Tool handlers return plain dicts serialized by orjson, skipping response model
+# validation on the hot path
+app = FastAPI(
+    title="RAG Retrieval MCP Server",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+def upstream_pool_stats() -> Dict[str, Optional[int]]:
+    """Open and idle connections in the RAG service connection pool
+
+    These come from httpcore internals, so they are reported as None when a
+    different httpx/httpcore version does not expose them.
+    """
+    try:
+        connections = app.state.rag_transport._pool.connections
+        idle = sum(connection.is_idle() for connection in connections)
+    except AttributeError:
+        return {"upstream_pool_connections": None, "upstream_pool_idle": None}
+    return {"upstream_pool_connections": len(connections), "upstream_pool_idle": idle}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    http_version = None
     try:
-        # Check if RAG service is available
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{RAG_API_BASE}/health")
-            rag_healthy = response.status_code == 200
+        # Check if RAG service is available; this bypasses the upstream limit so
+        # health stays responsive while the proxy is saturated
+        response = await app.state.rag_client.get("/health", timeout=upstream_timeout(5.0))
+        rag_healthy = response.status_code == 200
+        http_version = response.http_version
     except Exception:
         rag_healthy = False
     
@@ -38,184 +273,198 @@ async def health_check():
         "status": "healthy",
         "server": "rag-mcp",
         "rag_service_healthy": rag_healthy,
-        "rag_service_url": RAG_SERVICE_URL
+        "rag_service_url": RAG_SERVICE_URL,
+        "rag_service_http_version": http_version,
+        "upstream_in_flight": app.state.upstream_in_flight,
+        "upstream_concurrency_limit": UPSTREAM_CONCURRENCY,
+        **upstream_pool_stats()
     }
 
-@app.get("/tools")
-async def get_tools():
-    """Get available tools"""
-    return {
-        "tools": [
-            {
-                "name": "retrieve_documents",
-                "description": "Retrieve relevant documents from RAG configurations based on a query",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query to find relevant documents"
-                        },
-                        "configuration_name": {
-                            "type": "string",
-                            "description": "Name of the RAG configuration to search in",
-                            "default": "default"
-                        },
-                        "k": {
-                            "type": "integer",
-                            "description": "Number of documents to retrieve (1-50)",
-                            "default": 5,
-                            "minimum": 1,
-                            "maximum": 50
-                        },
-                        "similarity_threshold": {
-                            "type": "number",
-                            "description": "Minimum similarity threshold (0.0-1.0)",
-                            "default": 0.0,
-                            "minimum": 0.0,
-                            "maximum": 1.0
-                        },
-                        "use_reranking": {
-                            "type": "boolean",
-                            "description": "Whether to use reranking for better results",
-                            "default": false
-                        },
-                        "include_metadata": {
-                            "type": "boolean",
-                            "description": "Whether to include document metadata",
-                            "default": true
-                        }
+# Tool and resource listings are static, so they are serialized once at import
+TOOLS_JSON = orjson.dumps({
+    "tools": [
+        {
+            "name": "retrieve_documents",
+            "description": "Retrieve relevant documents from RAG configurations based on a query",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query to find relevant documents"
                     },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "retrieve_multi_config",
-                "description": "Retrieve documents from multiple RAG configurations with fusion",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query to find relevant documents"
-                        },
-                        "configuration_names": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of RAG configuration names to search in"
-                        },
-                        "k": {
-                            "type": "integer",
-                            "description": "Number of documents to retrieve per configuration",
-                            "default": 5,
-                            "minimum": 1,
-                            "maximum": 50
-                        },
-                        "fusion_method": {
-                            "type": "string",
-                            "description": "Method for fusing results from multiple configurations",
-                            "enum": ["rrf", "simple"],
-                            "default": "rrf"
-                        },
-                        "rrf_k_constant": {
-                            "type": "integer",
-                            "description": "Constant for RRF calculation",
-                            "default": 60,
-                            "minimum": 1
-                        },
-                        "use_reranking": {
-                            "type": "boolean",
-                            "description": "Whether to use reranking for better results",
-                            "default": false
-                        }
+                    "configuration_name": {
+                        "type": "string",
+                        "description": "Name of the RAG configuration to search in",
+                        "default": "default"
                     },
-                    "required": ["query", "configuration_names"]
-                }
-            },
-            {
-                "name": "list_configurations",
-                "description": "List available RAG configurations",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "names_only": {
-                            "type": "boolean",
-                            "description": "Return only configuration names without details",
-                            "default": true
-                        }
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of documents to retrieve (1-50)",
+                        "default": 5,
+                        "minimum": 1,
+                        "maximum": 50
+                    },
+                    "similarity_threshold": {
+                        "type": "number",
+                        "description": "Minimum similarity threshold (0.0-1.0)",
+                        "default": 0.0,
+                        "minimum": 0.0,
+                        "maximum": 1.0
+                    },
+                    "use_reranking": {
+                        "type": "boolean",
+                        "description": "Whether to use reranking for better results",
+                        "default": False
+                    },
+                    "include_metadata": {
+                        "type": "boolean",
+                        "description": "Whether to include document metadata",
+                        "default": True
                     }
-                }
-            },
-            {
-                "name": "get_configuration",
-                "description": "Get details of a specific RAG configuration",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "configuration_name": {
-                            "type": "string",
-                            "description": "Name of the configuration to retrieve"
-                        }
+                },
+                "required": ["query"]
+            }
+        },
+        {
+            "name": "retrieve_multi_config",
+            "description": "Retrieve documents from multiple RAG configurations with fusion",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query to find relevant documents"
                     },
-                    "required": ["configuration_name"]
-                }
-            },
-            {
-                "name": "query_with_generation",
-                "description": "Query documents and generate an answer using RAG",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The question or query to answer"
-                        },
-                        "configuration_name": {
-                            "type": "string",
-                            "description": "Name of the RAG configuration to use",
-                            "default": "default"
-                        },
-                        "k": {
-                            "type": "integer",
-                            "description": "Number of documents to retrieve for context",
-                            "default": 5,
-                            "minimum": 1,
-                            "maximum": 20
-                        },
-                        "similarity_threshold": {
-                            "type": "number",
-                            "description": "Minimum similarity threshold",
-                            "default": 0.7,
-                            "minimum": 0.0,
-                            "maximum": 1.0
-                        }
+                    "configuration_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "List of RAG configuration names to search in"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of documents to retrieve per configuration",
+                        "default": 5,
+                        "minimum": 1,
+                        "maximum": 50
+                    },
+                    "fusion_method": {
+                        "type": "string",
+                        "description": "Method for fusing results from multiple configurations",
+                        "enum": ["rrf", "simple"],
+                        "default": "rrf"
+                    },
+                    "rrf_k_constant": {
+                        "type": "integer",
+                        "description": "Constant for RRF calculation",
+                        "default": 60,
+                        "minimum": 1
                     },
-                    "required": ["query"]
+                    "use_reranking": {
+                        "type": "boolean",
+                        "description": "Whether to use reranking for better results",
+                        "default": False
+                    },
+                    "parallel": {
+                        "type": "boolean",
+                        "description": "Query each configuration concurrently and fuse the results locally",
+                        "default": False
+                    }
+                },
+                "required": ["query", "configuration_names"]
+            }
+        },
+        {
+            "name": "list_configurations",
+            "description": "List available RAG configurations",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "names_only": {
+                        "type": "boolean",
+                        "description": "Return only configuration names without details",
+                        "default": True
+                    }
                 }
             }
-        ]
-    }
+        },
+        {
+            "name": "get_configuration",
+            "description": "Get details of a specific RAG configuration",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "configuration_name": {
+                        "type": "string",
+                        "description": "Name of the configuration to retrieve"
+                    }
+                },
+                "required": ["configuration_name"]
+            }
+        },
+        {
+            "name": "query_with_generation",
+            "description": "Query documents and generate an answer using RAG",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The question or query to answer"
+                    },
+                    "configuration_name": {
+                        "type": "string",
+                        "description": "Name of the RAG configuration to use",
+                        "default": "default"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of documents to retrieve for context",
+                        "default": 5,
+                        "minimum": 1,
+                        "maximum": 20
+                    },
+                    "similarity_threshold": {
+                        "type": "number",
+                        "description": "Minimum similarity threshold",
+                        "default": 0.7,
+                        "minimum": 0.0,
+                        "maximum": 1.0
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    ]
+})
+
+@app.get("/tools")
+async def get_tools():
+    """Get available tools"""
+    return Response(content=TOOLS_JSON, media_type="application/json")
+
+RESOURCES_JSON = orjson.dumps({
+    "resources": [
+        {
+            "uri": "rag://configurations",
+            "name": "RAG Configurations",
+            "description": "List of available RAG configurations"
+        },
+        {
+            "uri": "rag://health",
+            "name": "RAG Service Health",
+            "description": "Health status of the RAG service"
+        }
+    ]
+})
 
 @app.get("/resources")
 async def get_resources():
     """Get available resources"""
-    return {
-        "resources": [
-            {
-                "uri": "rag://configurations",
-                "name": "RAG Configurations",
-                "description": "List of available RAG configurations"
-            },
-            {
-                "uri": "rag://health",
-                "name": "RAG Service Health",
-                "description": "Health status of the RAG service"
-            }
-        ]
-    }
+    return Response(content=RESOURCES_JSON, media_type="application/json")
 
-@app.post("/tools/retrieve_documents")
-async def retrieve_documents(request: ToolRequest) -> ToolResponse:
+@app.post("/tools/retrieve_documents", response_model=None)
+async def retrieve_documents(request: ToolRequest) -> Dict[str, Any]:
     """Retrieve relevant documents from a RAG configuration"""
     try:
         args = request.arguments
@@ -224,6 +473,11 @@ async def retrieve_documents(request: ToolRequest) -> ToolResponse:
         if not query:
             raise HTTPException(status_code=400, detail="Query parameter is required")
         
+        key = cache_key("retrieve_documents", args)
+        cached = RETRIEVAL_CACHE.get(key)
+        if cached is not None:
+            return {"content": cached, "success": True}
+        
         # Prepare request for RAG service
         rag_request = {
             "query": query,
@@ -232,48 +486,20 @@ async def retrieve_documents(request: ToolRequest) -> ToolResponse:
             "similarity_threshold": args.get("similarity_threshold", 0.0),
             "use_reranking": args.get("use_reranking", False),
             "include_metadata": args.get("include_metadata", True),
-            "include_vectors": False  # Don't include vectors in MCP response
+            "include_vectors": False,  # Don't include vectors in MCP response
+            "max_content_chars": MAX_CONTENT_CHARS
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{RAG_API_BASE}/retrieve",
-                json=rag_request
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await post_json("/retrieve", rag_request, timeout=30.0)
         
         # Format the response for MCP
-        documents = result.get("documents", [])
-        total_found = result.get("total_found", 0)
-        processing_time = result.get("processing_time", 0)
+        content = await format_off_loop(
+            len(result.get("documents", [])), format_retrieve_response, result, query
+        )
         
-        if not documents:
-            content = f"No relevant documents found for query: '{query}'"
-        else:
-            content_lines = [
-                f"Found {total_found} relevant documents for query: '{query}'",
-                f"Configuration: {result.get('configuration_name', 'unknown')}",
-                f"Processing time: {processing_time:.3f}s",
-                "",
-                "Documents:"
-            ]
-            
-            for i, doc in enumerate(documents, 1):
-                content_lines.append(f"\n{i}. Score: {doc.get('similarity_score', 'N/A')}")
-                content_lines.append(f"   Content: {doc.get('content', '')[:200]}...")
-                
-                if doc.get('metadata'):
-                    metadata = doc['metadata']
-                    if metadata.get('source'):
-                        content_lines.append(f"   Source: {metadata['source']}")
-                    if metadata.get('page'):
-                        content_lines.append(f"   Page: {metadata['page']}")
-        
-        content = "\n".join(content_lines)
-        
-        logger.info(f"Retrieved {total_found} documents for query: {query}")
-        return ToolResponse(content=content)
+        RETRIEVAL_CACHE[key] = content
+        logger.info(f"Retrieved {result.get('total_found', 0)} documents for query: {query}")
+        return {"content": content, "success": True}
         
     except httpx.HTTPStatusError as e:
         logger.error(f"RAG service error: {e}")
@@ -285,8 +511,76 @@ async def retrieve_documents(request: ToolRequest) -> ToolResponse:
         logger.error(f"Error retrieving documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tools/retrieve_multi_config")
-async def retrieve_multi_config(request: ToolRequest) -> ToolResponse:
+async def retrieve_single_configuration(query: str, configuration_name: str, k: int, use_reranking: bool) -> List[Dict[str, Any]]:
+    """Retrieve documents from one configuration"""
+    rag_request = {
+        "query": query,
+        "configuration_name": configuration_name,
+        "k": k,
+        "use_reranking": use_reranking,
+        "include_metadata": True,
+        "include_vectors": False,
+        "max_content_chars": MAX_CONTENT_CHARS
+    }
+    result = await post_json("/retrieve", rag_request, timeout=30.0)
+    return result.get("documents", [])
+
+# Result sets with at least this many documents are RRF-fused with NumPy
+NUMPY_FUSION_THRESHOLD = 500
+
+def rrf_fuse_numpy(result_lists: Dict[str, List[Dict[str, Any]]], rrf_k_constant: int, k: int) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion with the per-document score sums vectorized"""
+    doc_index = {}
+    fused_docs = []
+    positions = []
+    ranks = []
+    
+    for configuration_name, documents in result_lists.items():
+        for rank, doc in enumerate(documents, 1):
+            doc_key = doc.get("id") or doc.get("content", "")
+            position = doc_index.get(doc_key)
+            if position is None:
+                position = doc_index[doc_key] = len(fused_docs)
+                fused_docs.append({**doc, "source_configuration": configuration_name})
+            positions.append(position)
+            ranks.append(rank)
+    
+    scores = np.bincount(
+        positions,
+        weights=1.0 / (rrf_k_constant + np.asarray(ranks, dtype=np.float64)),
+        minlength=len(fused_docs)
+    )
+    # A stable sort keeps first-seen order among equal scores, as heapq.nlargest
+    # does, so ties at the cut-off resolve the same way on both paths
+    top = np.argsort(-scores, kind="stable")[:max(k, 0)]
+    return [{**fused_docs[i], "rrf_score": score} for i, score in zip(top.tolist(), scores[top].tolist())]
+
+def fuse_results(result_lists: Dict[str, List[Dict[str, Any]]], fusion_method: str, rrf_k_constant: int, k: int) -> List[Dict[str, Any]]:
+    """Fuse per-configuration results with reciprocal rank fusion or by raw similarity score"""
+    if (fusion_method == "rrf" and np is not None
+            and sum(map(len, result_lists.values())) >= NUMPY_FUSION_THRESHOLD):
+        return rrf_fuse_numpy(result_lists, rrf_k_constant, k)
+    
+    scores = defaultdict(float)
+    fused_docs = {}
+    
+    for configuration_name, documents in result_lists.items():
+        for rank, doc in enumerate(documents, 1):
+            doc_key = doc.get("id") or doc.get("content", "")
+            if fusion_method == "rrf":
+                scores[doc_key] += 1.0 / (rrf_k_constant + rank)
+            else:
+                scores[doc_key] = max(scores[doc_key], doc.get("similarity_score") or 0.0)
+            if doc_key not in fused_docs:
+                fused_docs[doc_key] = {**doc, "source_configuration": configuration_name}
+    
+    top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+    if fusion_method == "rrf":
+        return [{**fused_docs[doc_key], "rrf_score": score} for doc_key, score in top]
+    return [fused_docs[doc_key] for doc_key, _ in top]
+
+@app.post("/tools/retrieve_multi_config", response_model=None)
+async def retrieve_multi_config(request: ToolRequest) -> Dict[str, Any]:
     """Retrieve documents from multiple configurations with fusion"""
     try:
         args = request.arguments
@@ -298,63 +592,70 @@ async def retrieve_multi_config(request: ToolRequest) -> ToolResponse:
         if not configuration_names:
             raise HTTPException(status_code=400, detail="Configuration names are required")
         
-        # Prepare request for RAG service
-        rag_request = {
-            "query": query,
-            "configuration_names": configuration_names,
-            "k": args.get("k", 5),
-            "fusion_method": args.get("fusion_method", "rrf"),
-            "rrf_k_constant": args.get("rrf_k_constant", 60),
-            "use_reranking": args.get("use_reranking", False),
-            "include_metadata": True,
-            "include_vectors": False
-        }
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{RAG_API_BASE}/retrieve",
-                json=rag_request
+        key = cache_key("retrieve_multi_config", args)
+        cached = RETRIEVAL_CACHE.get(key)
+        if cached is not None:
+            return {"content": cached, "success": True}
+        
+        if args.get("parallel", False):
+            # Query every configuration concurrently so latency is bounded by the
+            # slowest one, then fuse locally; failed configurations are skipped
+            start_time = time.perf_counter()
+            k = args.get("k", 5)
+            fusion_method = args.get("fusion_method", "rrf")
+            responses = await asyncio.gather(
+                *(retrieve_single_configuration(query, name, k, args.get("use_reranking", False))
+                  for name in configuration_names),
+                return_exceptions=True
             )
-            response.raise_for_status()
-            result = response.json()
-        
-        # Format the response
-        documents = result.get("documents", [])
-        total_found = result.get("total_found", 0)
-        processing_time = result.get("processing_time", 0)
-        fusion_method = result.get("fusion_method", "unknown")
-        
-        if not documents:
-            content = f"No relevant documents found for query: '{query}'"
+            
+            result_lists = {}
+            for name, documents in zip(configuration_names, responses):
+                if isinstance(documents, Exception):
+                    logger.warning(f"Skipping configuration '{name}': {documents}")
+                else:
+                    result_lists[name] = documents
+            if not result_lists:
+                raise responses[0]
+            
+            documents = fuse_results(result_lists, fusion_method, args.get("rrf_k_constant", 60), k)
+            result = {
+                "documents": documents,
+                "total_found": len(documents),
+                "processing_time": time.perf_counter() - start_time,
+                "fusion_method": fusion_method
+            }
         else:
-            content_lines = [
-                f"Found {total_found} relevant documents for query: '{query}'",
-                f"Configurations: {', '.join(configuration_names)}",
-                f"Fusion method: {fusion_method}",
-                f"Processing time: {processing_time:.3f}s",
-                "",
-                "Documents:"
-            ]
+            # Prepare request for RAG service
+            rag_request = {
+                "query": query,
+                "configuration_names": configuration_names,
+                "k": args.get("k", 5),
+                "fusion_method": args.get("fusion_method", "rrf"),
+                "rrf_k_constant": args.get("rrf_k_constant", 60),
+                "use_reranking": args.get("use_reranking", False),
+                "include_metadata": True,
+                "include_vectors": False,
+                "max_content_chars": MAX_CONTENT_CHARS
+            }
             
-            for i, doc in enumerate(documents, 1):
-                content_lines.append(f"\n{i}. Score: {doc.get('similarity_score', 'N/A')}")
-                if doc.get('rrf_score'):
-                    content_lines.append(f"   RRF Score: {doc.get('rrf_score', 'N/A')}")
-                if doc.get('source_configuration'):
-                    content_lines.append(f"   Source Config: {doc['source_configuration']}")
-                content_lines.append(f"   Content: {doc.get('content', '')[:200]}...")
+            result = await post_json("/retrieve", rag_request, timeout=30.0)
         
-        content = "\n".join(content_lines)
+        # Format the response
+        content = await format_off_loop(
+            len(result.get("documents", [])), format_multi_config_response, result, query, configuration_names
+        )
         
-        logger.info(f"Retrieved {total_found} documents from {len(configuration_names)} configurations")
-        return ToolResponse(content=content)
+        RETRIEVAL_CACHE[key] = content
+        logger.info(f"Retrieved {result.get('total_found', 0)} documents from {len(configuration_names)} configurations")
+        return {"content": content, "success": True}
         
     except Exception as e:
         logger.error(f"Error in multi-config retrieval: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tools/list_configurations")
-async def list_configurations(request: ToolRequest) -> ToolResponse:
+@app.post("/tools/list_configurations", response_model=None)
+async def list_configurations(request: ToolRequest) -> Dict[str, Any]:
     """List available RAG configurations"""
     try:
         args = request.arguments
@@ -362,13 +663,9 @@ async def list_configurations(request: ToolRequest) -> ToolResponse:
         
         params = {"names_only": names_only}
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{RAG_API_BASE}/configurations",
-                params=params
-            )
-            response.raise_for_status()
-            result = response.json()
+        response = await get_upstream("/configurations", timeout=10.0, params=params)
+        response.raise_for_status()
+        result = orjson.loads(response.content)
         
         if names_only:
             names = result.get("names", [])
@@ -377,25 +674,25 @@ async def list_configurations(request: ToolRequest) -> ToolResponse:
         else:
             configurations = result.get("configurations", [])
             total_count = result.get("total_count", 0)
-            content_lines = [f"Available RAG configurations ({total_count}):"]
-            
-            for config in configurations:
-                content_lines.append(f"\n- {config['configuration_name']}")
-                content_lines.append(f"  Documents: {config['document_count']}")
-                if config.get('last_updated'):
-                    content_lines.append(f"  Last updated: {config['last_updated']}")
-            
-            content = "\n".join(content_lines)
+            content = "\n".join([
+                f"Available RAG configurations ({total_count}):",
+                *(
+                    f"\n- {config['configuration_name']}"
+                    f"\n  Documents: {config['document_count']}"
+                    + (f"\n  Last updated: {config['last_updated']}" if config.get('last_updated') else "")
+                    for config in configurations
+                )
+            ])
         
         logger.info(f"Listed {result.get('total_count', 0)} configurations")
-        return ToolResponse(content=content)
+        return {"content": content, "success": True}
         
     except Exception as e:
         logger.error(f"Error listing configurations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tools/get_configuration")
-async def get_configuration(request: ToolRequest) -> ToolResponse:
+@app.post("/tools/get_configuration", response_model=None)
+async def get_configuration(request: ToolRequest) -> Dict[str, Any]:
     """Get details of a specific RAG configuration"""
     try:
         args = request.arguments
@@ -404,41 +701,32 @@ async def get_configuration(request: ToolRequest) -> ToolResponse:
         if not configuration_name:
             raise HTTPException(status_code=400, detail="Configuration name is required")
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{RAG_API_BASE}/configurations/{configuration_name}"
-            )
-            response.raise_for_status()
-            result = response.json()
+        response = await get_upstream(f"/configurations/{configuration_name}", timeout=10.0)
+        response.raise_for_status()
+        result = orjson.loads(response.content)
         
         config = result.get("config", {})
-        content_lines = [
+        chunking = config.get("chunking")
+        embedding = config.get("embedding")
+        vector_store = config.get("vector_store")
+        generation = config.get("generation")
+        
+        # Format key configuration settings, skipping sections that are absent
+        settings = [
+            chunking and f"- Chunking: {chunking.get('strategy', 'unknown')} (size: {chunking.get('chunk_size', 'N/A')})",
+            embedding and f"- Embedding: {embedding.get('model', 'unknown')}",
+            vector_store and f"- Vector Store: {vector_store.get('type', 'unknown')}",
+            generation and f"- Generation: {generation.get('model', 'unknown')}"
+        ]
+        content = "\n".join([
             f"Configuration: {configuration_name}",
             "",
-            "Settings:"
-        ]
-        
-        # Format key configuration settings
-        if config.get("chunking"):
-            chunking = config["chunking"]
-            content_lines.append(f"- Chunking: {chunking.get('strategy', 'unknown')} (size: {chunking.get('chunk_size', 'N/A')})")
-        
-        if config.get("embedding"):
-            embedding = config["embedding"]
-            content_lines.append(f"- Embedding: {embedding.get('model', 'unknown')}")
-        
-        if config.get("vector_store"):
-            vector_store = config["vector_store"]
-            content_lines.append(f"- Vector Store: {vector_store.get('type', 'unknown')}")
-        
-        if config.get("generation"):
-            generation = config["generation"]
-            content_lines.append(f"- Generation: {generation.get('model', 'unknown')}")
-        
-        content = "\n".join(content_lines)
+            "Settings:",
+            *filter(None, settings)
+        ])
         
         logger.info(f"Retrieved configuration: {configuration_name}")
-        return ToolResponse(content=content)
+        return {"content": content, "success": True}
         
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
@@ -448,8 +736,8 @@ async def get_configuration(request: ToolRequest) -> ToolResponse:
         logger.error(f"Error getting configuration: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tools/query_with_generation")
-async def query_with_generation(request: ToolRequest) -> ToolResponse:
+@app.post("/tools/query_with_generation", response_model=None)
+async def query_with_generation(request: ToolRequest) -> Dict[str, Any]:
     """Query documents and generate an answer using RAG"""
     try:
         args = request.arguments
@@ -458,6 +746,11 @@ async def query_with_generation(request: ToolRequest) -> ToolResponse:
         if not query:
             raise HTTPException(status_code=400, detail="Query parameter is required")
         
+        key = cache_key("query_with_generation", args)
+        cached = GENERATION_CACHE.get(key)
+        if cached is not None:
+            return {"content": cached, "success": True}
+        
         # Prepare request for RAG service
         rag_request = {
             "query": query,
@@ -467,39 +760,16 @@ async def query_with_generation(request: ToolRequest) -> ToolResponse:
             "include_metadata": True
         }
         
-        async with httpx.AsyncClient(timeout=60.0) as client:  # Longer timeout for generation
-            response = await client.post(
-                f"{RAG_API_BASE}/query",
-                json=rag_request
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await post_json("/query", rag_request, timeout=60.0)  # Longer timeout for generation
         
         # Format the response
-        answer = result.get("answer", "No answer generated")
-        sources = result.get("sources", [])
-        processing_time = result.get("processing_time", 0)
-        
-        content_lines = [
-            f"Query: {query}",
-            f"Configuration: {result.get('configuration_name', 'unknown')}",
-            f"Processing time: {processing_time:.3f}s",
-            "",
-            f"Answer: {answer}",
-            "",
-            f"Sources ({len(sources)}):"
-        ]
-        
-        for i, source in enumerate(sources, 1):
-            content_lines.append(f"\n{i}. Score: {source.get('similarity_score', 'N/A')}")
-            content_lines.append(f"   Content: {source.get('content', '')[:150]}...")
-            if source.get('metadata', {}).get('source'):
-                content_lines.append(f"   Source: {source['metadata']['source']}")
-        
-        content = "\n".join(content_lines)
+        content = await format_off_loop(
+            len(result.get("sources", [])), format_generation_response, result, query
+        )
         
+        GENERATION_CACHE[key] = content
         logger.info(f"Generated answer for query: {query}")
-        return ToolResponse(content=content)
+        return {"content": content, "success": True}
         
     except Exception as e:
         logger.error(f"Error in query with generation: {str(e)}")
@@ -509,10 +779,9 @@ async def query_with_generation(request: ToolRequest) -> ToolResponse:
 async def get_configurations_resource():
     """Get list of RAG configurations as a resource"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{RAG_API_BASE}/configurations?names_only=true")
-            response.raise_for_status()
-            result = response.json()
+        response = await get_upstream("/configurations?names_only=true", timeout=10.0)
+        response.raise_for_status()
+        result = orjson.loads(response.content)
         
         names = result.get("names", [])
         return {
@@ -529,13 +798,12 @@ async def get_configurations_resource():
 async def get_health_resource():
     """Get RAG service health as a resource"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{RAG_API_BASE}/health")
-            response.raise_for_status()
-            result = response.json()
+        response = await app.state.rag_client.get("/health", timeout=upstream_timeout(5.0))
+        response.raise_for_status()
+        result = orjson.loads(response.content)
         
         return {
-            "content": json.dumps(result, indent=2),
+            "content": orjson.dumps(result, option=orjson.OPT_INDENT_2).decode(),
             "mimeType": "application/json"
         }
     except Exception as e:
@@ -1,54 +1,84 @@
 #!/usr/bin/env python3
 """
 Start all MCP servers
+
+Pass --combined to serve them all from a single process instead (see combined.py)
 """
+import socket
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def start_server(script_name, server_name):
-    """Start an MCP server"""
-    script_path = Path(__file__).parent / script_name
-    
-    print(f"Starting {server_name}...")
-    process = subprocess.Popen([sys.executable, str(script_path)])
-    
-    # Give it a moment to start
-    time.sleep(2)
+SERVERS = [
+    {"name": "Weather Server", "port": 8002, "script": "start_weather_server.py"},
+    {"name": "Memory Server", "port": 8003, "script": "start_memory_server.py"},
+    {"name": "Calculator Server", "port": 8004, "script": "start_calculator_server.py"},
+    {"name": "RAG Server", "port": 8005, "script": "start_rag_server.py"}
+]
+
+# How long to wait for a server to accept connections, and how often to check
+STARTUP_TIMEOUT = 5.0
+POLL_INTERVAL = 0.05
+
+def wait_for_port(process, port, host="127.0.0.1", timeout=STARTUP_TIMEOUT):
+    """Poll until the port accepts connections; False if the process exits or time runs out"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(POLL_INTERVAL)
+    return False
+
+def spawn_server(server):
+    """Start an MCP server process without waiting for it"""
+    script_path = Path(__file__).parent / server["script"]
     
-    if process.poll() is None:
-        print(f"✓ {server_name} started successfully (PID: {process.pid})")
+    print(f"Starting {server['name']}...")
+    return subprocess.Popen([sys.executable, str(script_path)])
+
+def check_server(server, process):
+    """Wait until a spawned server is listening; None if it failed to start"""
+    if wait_for_port(process, server["port"]):
+        print(f"✓ {server['name']} started successfully (PID: {process.pid})")
+        return process
+    elif process.poll() is None:
+        print(f"⚠ {server['name']} is running (PID: {process.pid}) but not yet listening on port {server['port']}")
         return process
     else:
-        print(f"✗ Failed to start {server_name}")
+        print(f"✗ Failed to start {server['name']}")
         return None
 
+def start_servers(servers=SERVERS):
+    """Spawn all servers at once, then wait for them to come up in parallel"""
+    spawned = [spawn_server(server) for server in servers]
+    
+    with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+        started = list(pool.map(check_server, servers, spawned))
+    
+    return [(process, server["name"]) for server, process in zip(servers, started) if process]
+
 if __name__ == "__main__":
+    if "--combined" in sys.argv[1:]:
+        from combined import run
+        run()
+        sys.exit(0)
+    
     print("Starting all MCP servers...")
     print("=" * 50)
     
-    servers = [
-        {"name": "weather", "port": 8002, "script": "start_weather_server.py"},
-        {"name": "memory", "port": 8003, "script": "start_memory_server.py"},
-        {"name": "calculator", "port": 8004, "script": "start_calculator_server.py"},
-        {"name": "rag", "port": 8005, "script": "start_rag_server.py"}
-    ]
-    
-    processes = []
-    
-    for server in servers:
-        process = start_server(server["script"], server["name"].capitalize() + " Server")
-        if process:
-            processes.append((process, server["name"].capitalize() + " Server"))
+    processes = start_servers()
     
     print("\n" + "=" * 50)
     print(f"Started {len(processes)} MCP servers")
     print("\nServer URLs:")
-    print("- Weather Server: http://localhost:8002")
-    print("- Memory Server: http://localhost:8003")
-    print("- Calculator Server: http://localhost:8004")
-    print("- RAG Server: http://localhost:8005")
+    for server in SERVERS:
+        print(f"- {server['name']}: http://localhost:{server['port']}")
     
     print("\nPress Ctrl+C to stop all servers...")
     
@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 """
 Start the RAG Retrieval MCP Server
+
+Environment variables:
+    RAG_SERVER_DEV: Set to 1 to auto-reload on code changes (single process)
+    RAG_SERVER_WORKERS: Number of worker processes (default: 1). Each worker
+        has its own RAG_UPSTREAM_CONCURRENCY limit and connection pool, so the
+        RAG service sees up to workers x that many concurrent requests
 """
 import uvicorn
 import sys
@@ -11,10 +17,14 @@ server_dir = os.path.join(os.path.dirname(__file__), "rag_server")
 sys.path.insert(0, server_dir)
 
 if __name__ == "__main__":
+    dev = os.getenv("RAG_SERVER_DEV") == "1"
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8005,
-        reload=True,
+        # reload and workers are mutually exclusive in uvicorn
+        reload=dev,
+        workers=None if dev else int(os.getenv("RAG_SERVER_WORKERS", "1")),
         log_level="info"
     )
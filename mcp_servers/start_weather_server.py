@@ -15,4 +15,4 @@ if __name__ == "__main__":
     import uvicorn
     
     print("Starting Weather MCP Server on http://localhost:8002")
-    uvicorn.run(app, host="0.0.0.0", port=8002, log_level="info")
+    uvicorn.run(app, host="0.0.0.0", port=8002, log_level="info", access_log=False)
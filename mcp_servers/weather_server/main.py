@@ -1,18 +1,25 @@
 import os
-import httpx
 import logging
-from typing import Dict, Any
-from fastapi import FastAPI, HTTPException
+import orjson
+from functools import lru_cache
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+# Per-request details are logged at DEBUG; set WEATHER_LOG_LEVEL=DEBUG to see them
+logging.basicConfig(level=os.getenv("WEATHER_LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Weather MCP Server", version="1.0.0")
+app = FastAPI(title="Weather MCP Server", version="1.0.0", default_response_class=ORJSONResponse)
+
+class WeatherArgs(BaseModel):
+    # Defaults to empty so a missing city gets the handlers' own 400
+    city: str = ""
+    days: int = 3
 
 class ToolRequest(BaseModel):
-    arguments: Dict[str, Any]
+    arguments: WeatherArgs
 
 class ToolResponse(BaseModel):
     content: str
@@ -27,133 +34,155 @@ MOCK_WEATHER_DATA = {
     "sydney": {"temp": 25, "description": "sunny", "humidity": 60},
 }
 
+# Reported for cities without mock data
+DEFAULT_WEATHER = {"temp": 20, "description": "partly cloudy", "humidity": 60}
+
+# Forecast lengths that can be requested, in days
+FORECAST_DAYS = frozenset(range(1, 8))
+
+# Responses depend only on the normalized arguments, so repeat requests reuse the
+# formatted text; the bound keeps arbitrary unknown city names from growing it
+@lru_cache(maxsize=512)
+def format_weather(city: str) -> str:
+    """Current weather text for a normalized city name"""
+    weather_data = MOCK_WEATHER_DATA.get(city, DEFAULT_WEATHER)
+    return f"Weather in {city.title()}: {weather_data['description']}, {weather_data['temp']}°C, humidity {weather_data['humidity']}%"
+
+@lru_cache(maxsize=512)
+def format_forecast(city: str, days: int) -> str:
+    """Forecast text for a normalized city name and day count"""
+    base_weather = MOCK_WEATHER_DATA.get(city, DEFAULT_WEATHER)
+    description = base_weather["description"]
+    # Vary temperature slightly for each day: -2, 0, 2, 4...
+    first_temp = base_weather["temp"] - 2
+    
+    return "\n".join([
+        f"Weather forecast for {city.title()} ({days} days):",
+        *(f"Day {day}: {description}, {first_temp + (day - 1) * 2}°C" for day in range(1, days + 1))
+    ])
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "server": "weather-mcp"}
 
+# Tool, resource and city listings are static, so they are serialized once at import
+TOOLS_JSON = orjson.dumps({
+    "tools": [
+        {
+            "name": "get_weather",
+            "description": "Get current weather information for a city",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "city": {
+                        "type": "string",
+                        "description": "The city name to get weather for"
+                    }
+                },
+                "required": ["city"]
+            }
+        },
+        {
+            "name": "get_forecast",
+            "description": "Get weather forecast for a city",
+            "parameters": {
+                "type": "object", 
+                "properties": {
+                    "city": {
+                        "type": "string",
+                        "description": "The city name to get forecast for"
+                    },
+                    "days": {
+                        "type": "integer",
+                        "description": "Number of days for forecast (1-7)",
+                        "default": 3
+                    }
+                },
+                "required": ["city"]
+            }
+        }
+    ]
+})
+
+RESOURCES_JSON = orjson.dumps({
+    "resources": [
+        {
+            "uri": "weather://cities",
+            "name": "Available Cities",
+            "description": "List of cities with weather data"
+        }
+    ]
+})
+
+CITIES_JSON = orjson.dumps({
+    "content": f"Available cities: {', '.join(city.title() for city in MOCK_WEATHER_DATA)}",
+    "mimeType": "text/plain"
+})
+
 @app.get("/tools")
 async def get_tools():
     """Get available tools"""
-    return {
-        "tools": [
-            {
-                "name": "get_weather",
-                "description": "Get current weather information for a city",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "The city name to get weather for"
-                        }
-                    },
-                    "required": ["city"]
-                }
-            },
-            {
-                "name": "get_forecast",
-                "description": "Get weather forecast for a city",
-                "parameters": {
-                    "type": "object", 
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "The city name to get forecast for"
-                        },
-                        "days": {
-                            "type": "integer",
-                            "description": "Number of days for forecast (1-7)",
-                            "default": 3
-                        }
-                    },
-                    "required": ["city"]
-                }
-            }
-        ]
-    }
+    return Response(content=TOOLS_JSON, media_type="application/json")
 
 @app.get("/resources")
 async def get_resources():
     """Get available resources"""
-    return {
-        "resources": [
-            {
-                "uri": "weather://cities",
-                "name": "Available Cities",
-                "description": "List of cities with weather data"
-            }
-        ]
-    }
+    return Response(content=RESOURCES_JSON, media_type="application/json")
+
+# Body of the 400 for tool calls without a city, matching FastAPI's HTTPException
+# format; each call gets its own Response, since Starlette may modify it
+MISSING_CITY_JSON = orjson.dumps({"detail": "City parameter is required"})
 
-@app.post("/tools/get_weather")
-async def get_weather(request: ToolRequest) -> ToolResponse:
+def missing_city_response() -> Response:
+    """400 response for a tool call without a city"""
+    return Response(content=MISSING_CITY_JSON, status_code=400, media_type="application/json")
+
+# The tool handlers only read cached, in-memory data, so they stay on the event
+# loop; errors other than a missing city surface as ordinary server errors.
+# They return the serialized response directly, skipping response model validation
+# and encoding; ToolResponse still documents the body in the OpenAPI schema.
+@app.post("/tools/get_weather", responses={200: {"model": ToolResponse}})
+async def get_weather(request: ToolRequest) -> ORJSONResponse:
     """Get current weather for a city"""
-    try:
-        city = request.arguments.get("city", "").lower().strip()
-        
-        if not city:
-            raise HTTPException(status_code=400, detail="City parameter is required")
-        
-        # Use mock data for demonstration
-        weather_data = MOCK_WEATHER_DATA.get(city)
-        
-        if not weather_data:
-            # Return a generic response for unknown cities
-            weather_data = {"temp": 20, "description": "partly cloudy", "humidity": 60}
-            logger.info(f"Using mock data for unknown city: {city}")
-        
-        result = f"Weather in {city.title()}: {weather_data['description']}, {weather_data['temp']}°C, humidity {weather_data['humidity']}%"
-        
-        logger.info(f"Weather request for {city}: {result}")
-        return ToolResponse(content=result)
-        
-    except Exception as e:
-        logger.error(f"Error getting weather: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/tools/get_forecast")
-async def get_forecast(request: ToolRequest) -> ToolResponse:
+    city = request.arguments.city.lower().strip()
+    
+    if not city:
+        return missing_city_response()
+    
+    # Use mock data for demonstration; unknown cities get a generic response
+    if city not in MOCK_WEATHER_DATA:
+        logger.debug("Using mock data for unknown city: %s", city)
+    
+    result = format_weather(city)
+    
+    logger.debug("Weather request for %s: %s", city, result)
+    return ORJSONResponse({"content": result, "success": True})
+
+@app.post("/tools/get_forecast", responses={200: {"model": ToolResponse}})
+async def get_forecast(request: ToolRequest) -> ORJSONResponse:
     """Get weather forecast for a city"""
-    try:
-        city = request.arguments.get("city", "").lower().strip()
-        days = request.arguments.get("days", 3)
-        
-        if not city:
-            raise HTTPException(status_code=400, detail="City parameter is required")
-        
-        if days < 1 or days > 7:
-            days = 3
-        
-        # Generate mock forecast data
-        base_weather = MOCK_WEATHER_DATA.get(city, {"temp": 20, "description": "partly cloudy", "humidity": 60})
-        
-        forecast_lines = [f"Weather forecast for {city.title()} ({days} days):"]
-        
-        for day in range(1, days + 1):
-            # Vary temperature slightly for each day
-            temp_variation = (day - 1) * 2 - 2  # -2, 0, 2, 4...
-            temp = base_weather["temp"] + temp_variation
-            forecast_lines.append(f"Day {day}: {base_weather['description']}, {temp}°C")
-        
-        result = "\n".join(forecast_lines)
-        
-        logger.info(f"Forecast request for {city} ({days} days)")
-        return ToolResponse(content=result)
-        
-    except Exception as e:
-        logger.error(f"Error getting forecast: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    city = request.arguments.city.lower().strip()
+    days = request.arguments.days
+    
+    if not city:
+        return missing_city_response()
+    
+    # Out-of-range requests fall back to the default, which also keeps the
+    # forecast cache to at most seven entries per city
+    days = days if days in FORECAST_DAYS else 3
+    
+    # Generate mock forecast data
+    result = format_forecast(city, days)
+    
+    logger.debug("Forecast request for %s (%s days)", city, days)
+    return ORJSONResponse({"content": result, "success": True})
 
 @app.get("/resources/weather://cities")
 async def get_cities_resource():
     """Get list of available cities"""
-    cities = list(MOCK_WEATHER_DATA.keys())
-    return {
-        "content": f"Available cities: {', '.join(city.title() for city in cities)}",
-        "mimeType": "text/plain"
-    }
+    return Response(content=CITIES_JSON, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002, log_level="info")
+    uvicorn.run(app, host="0.0.0.0", port=8002, log_level="info", access_log=False)
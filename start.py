@@ -3,41 +3,38 @@
 Startup script for the Agent Platform
 """
 
+import importlib.util
 import os
 import sys
 import subprocess
-from pathlib import Path
+
+REQUIRED_MODULES = ("fastapi", "uvicorn", "langchain", "langgraph", "pydantic")
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    try:
-        import fastapi
-        import uvicorn
-        import langchain
-        import langgraph
-        import pydantic
-        print("✓ All required dependencies are installed")
-        return True
-    except ImportError as e:
-        print(f"✗ Missing dependency: {e}")
+    # find_spec locates each package without importing (and initializing) it
+    missing = [module for module in REQUIRED_MODULES if importlib.util.find_spec(module) is None]
+    if missing:
+        for module in missing:
+            print(f"✗ Missing dependency: {module}")
         print("Please run: pip install -r requirements.txt")
         return False
+    print("✓ All required dependencies are installed")
+    return True
 
 def setup_environment():
     """Set up environment variables and directories"""
     # Create storage directory
-    storage_path = Path("./storage")
-    storage_path.mkdir(exist_ok=True)
+    storage_path = "./storage"
+    os.makedirs(storage_path, exist_ok=True)
     print(f"✓ Storage directory created: {storage_path}")
     
     # Check for .env file
-    env_file = Path(".env")
-    if not env_file.exists():
+    if not os.path.exists(".env"):
         print("⚠ No .env file found. Copying from .env.example")
-        example_file = Path(".env.example")
-        if example_file.exists():
+        if os.path.exists(".env.example"):
             import shutil
-            shutil.copy(example_file, env_file)
+            shutil.copyfile(".env.example", ".env")
             print("✓ Created .env file from example")
             print("Please edit .env file with your API keys before running the server")
         else:
@@ -79,6 +76,9 @@ def main():
     print("  python main.py")
     print("\nOr with uvicorn:")
     print("  uvicorn main:app --host 0.0.0.0 --port 8000 --reload")
+    print("\nFor production (no reload, one worker per core):")
+    print("  uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4")
+    print("  gunicorn main:app -k uvicorn_worker.UvicornWorker -w 4 -b 0.0.0.0:8000")
     print("\nAPI Documentation will be available at:")
     print("  http://localhost:8000/docs")
     print("\nHealth check:")
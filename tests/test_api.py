@@ -1,79 +1,100 @@
+import asyncio
 import pytest
-from fastapi.testclient import TestClient
+import httpx
 import tempfile
 import shutil
 
 from main import app
+from app.api.endpoints import agent_service
 
-@pytest.fixture
-def temp_storage(monkeypatch):
-    """Create a temporary storage directory for testing"""
+@pytest.fixture(scope="module")
+def temp_storage():
+    """Create a temporary storage directory shared by the module's tests"""
     temp_dir = tempfile.mkdtemp()
-    monkeypatch.setattr('app.config.settings.STORAGE_PATH', temp_dir)
-    yield temp_dir
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('app.config.settings.STORAGE_PATH', temp_dir)
+        yield temp_dir
     shutil.rmtree(temp_dir)
 
-@pytest.fixture
-def client(temp_storage):
-    """Create a test client"""
-    return TestClient(app)
-
-def test_root_endpoint(client):
+@pytest.fixture(scope="module")
+def event_loop():
+    """One event loop for the module, so the shared client can be reused across tests"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture(scope="module")
+async def client(temp_storage):
+    """Create an async test client calling the app in-process, started once for the whole module"""
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+
+@pytest.fixture(autouse=True)
+def restore_configurations():
+    """Undo agent configuration changes made by a test"""
+    configurations = agent_service.configurations.copy()
+    yield
+    agent_service.configurations.clear()
+    agent_service.configurations.update(configurations)
+
+async def test_root_endpoint(client):
     """Test the root endpoint"""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
     assert "Agent Platform" in data["message"]
 
-def test_health_endpoint(client):
+async def test_health_endpoint(client):
     """Test the health endpoint"""
-    response = client.get("/health")
+    response = await client.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
 
-def test_api_health_endpoint(client):
+async def test_api_health_endpoint(client):
     """Test the API health endpoint"""
-    response = client.get("/api/v1/health")
+    response = await client.get("/api/v1/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
     assert "services" in data
 
-def test_list_agents(client):
+async def test_list_agents(client):
     """Test listing agents"""
-    response = client.get("/api/v1/agents")
+    response = await client.get("/api/v1/agents")
     assert response.status_code == 200
     data = response.json()
     assert "agents" in data
     assert "count" in data
     assert data["count"] >= 1  # Should have default agent
 
-def test_list_agent_names(client):
+async def test_list_agent_names(client):
     """Test listing agent names only"""
-    response = client.get("/api/v1/agents?names_only=true")
+    response = await client.get("/api/v1/agents?names_only=true")
     assert response.status_code == 200
     data = response.json()
     assert "names" in data
     assert "count" in data
     assert "default" in data["names"]
 
-def test_get_default_agent(client):
+async def test_get_default_agent(client):
     """Test getting the default agent"""
-    response = client.get("/api/v1/agents/default")
+    response = await client.get("/api/v1/agents/default")
     assert response.status_code == 200
     data = response.json()
     assert "agent_name" in data
     assert "config" in data
     assert data["agent_name"] == "default"
 
-def test_get_nonexistent_agent(client):
+async def test_get_nonexistent_agent(client):
     """Test getting a non-existent agent"""
-    response = client.get("/api/v1/agents/nonexistent")
+    response = await client.get("/api/v1/agents/nonexistent")
     assert response.status_code == 404
 
-def test_create_agent(client):
+async def test_create_agent(client):
     """Test creating a new agent"""
     agent_config = {
         "name": "test_agent",
@@ -103,14 +124,14 @@ def test_create_agent(client):
         }
     }
     
-    response = client.post("/api/v1/agents", json=agent_config)
+    response = await client.post("/api/v1/agents", json=agent_config)
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
     assert "agent_name" in data
     assert data["agent_name"] == "test_agent"
 
-def test_duplicate_agent(client):
+async def test_duplicate_agent(client):
     """Test duplicating an agent"""
     # First create an agent
     agent_config = {
@@ -123,7 +144,7 @@ def test_duplicate_agent(client):
         }
     }
     
-    client.post("/api/v1/agents", json=agent_config)
+    await client.post("/api/v1/agents", json=agent_config)
     
     # Now duplicate it
     duplicate_request = {
@@ -131,7 +152,7 @@ def test_duplicate_agent(client):
         "target_name": "target_agent"
     }
     
-    response = client.post("/api/v1/agents/duplicate", json=duplicate_request)
+    response = await client.post("/api/v1/agents/duplicate", json=duplicate_request)
     assert response.status_code == 200
     data = response.json()
     assert "source_name" in data
@@ -139,7 +160,7 @@ def test_duplicate_agent(client):
     assert data["source_name"] == "source_agent"
     assert data["target_name"] == "target_agent"
 
-def test_delete_agent(client):
+async def test_delete_agent(client):
     """Test deleting an agent"""
     # First create an agent
     agent_config = {
@@ -152,18 +173,18 @@ def test_delete_agent(client):
         }
     }
     
-    client.post("/api/v1/agents", json=agent_config)
+    await client.post("/api/v1/agents", json=agent_config)
     
     # Now delete it
-    response = client.delete("/api/v1/agents/delete_me")
+    response = await client.delete("/api/v1/agents/delete_me")
     assert response.status_code == 200
     data = response.json()
     assert data["deleted"] is True
     assert data["agent_name"] == "delete_me"
 
-def test_list_tools(client):
+async def test_list_tools(client):
     """Test listing available tools"""
-    response = client.get("/api/v1/tools")
+    response = await client.get("/api/v1/tools")
     assert response.status_code == 200
     data = response.json()
     assert "tools" in data
@@ -174,7 +195,7 @@ def test_list_tools(client):
     tools = data["tools"]
     assert "calculator" in tools
 
-def test_copilotkit_chat(client):
+async def test_copilotkit_chat(client):
     """Test CopilotKit compatible endpoint"""
     chat_request = {
         "messages": [
@@ -188,18 +209,18 @@ def test_copilotkit_chat(client):
     
     # Note: This test might fail if no API keys are configured
     # In a real test environment, you'd mock the LLM calls
-    response = client.post("/api/v1/copilotkit/chat", json=chat_request)
+    response = await client.post("/api/v1/copilotkit/chat", json=chat_request)
     # We expect either success or a configuration error
     assert response.status_code in [200, 500]
 
-def test_legacy_agent_endpoint(client):
+async def test_legacy_agent_endpoint(client):
     """Test legacy agent endpoint"""
     request_data = {
         "input": "Hello, test message"
     }
     
     # Note: This test might fail if no API keys are configured
-    response = client.post("/agent", json=request_data)
+    response = await client.post("/agent", json=request_data)
     # We expect either success or a configuration error
     assert response.status_code in [200, 500]
     
@@ -0,0 +1,124 @@
+import importlib.util
+import math
+import sys
+from pathlib import Path
+
+import pytest
+import httpx
+
+CALCULATOR_MAIN = Path(__file__).parent.parent / "mcp_servers" / "calculator_server" / "main.py"
+
+def load_calculator(module_name):
+    """Import a fresh copy of the calculator server under its own module name"""
+    spec = importlib.util.spec_from_file_location(module_name, CALCULATOR_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="module", params=["numpy", "fallback"])
+def calculator(request):
+    """The calculator server with and without NumPy available"""
+    with pytest.MonkeyPatch.context() as mp:
+        if request.param == "fallback":
+            mp.setitem(sys.modules, "numpy", None)
+        return load_calculator(f"calculator_server_{request.param}")
+
+@pytest.fixture
+async def client(calculator):
+    """Create an async test client calling the calculator server in-process"""
+    transport = httpx.ASGITransport(app=calculator.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+        yield test_client
+
+async def statistics_text(client, numbers, measures):
+    response = await client.post("/tools/statistics", json={"arguments": {"numbers": numbers, "measures": measures}})
+    assert response.status_code == 200
+    return response.json()["content"]
+
+async def test_statistics_keep_integer_results(client):
+    """Integer input reports min, max, sum and an odd-length median as ints"""
+    text = await statistics_text(client, [4, 1, 3, 2, 5], ["mean", "median", "min", "max", "sum", "count"])
+    assert text == (
+        "Statistics for 5 numbers:\n"
+        "mean: 3.0\n"
+        "median: 3\n"
+        "min: 1\n"
+        "max: 5\n"
+        "sum: 15\n"
+        "count: 5"
+    )
+
+async def test_statistics_even_length_median(client):
+    """An even-length median averages the two middle values"""
+    text = await statistics_text(client, [1, 2, 3, 4], ["median", "min", "max", "sum"])
+    assert text == "Statistics for 4 numbers:\nmedian: 2.5\nmin: 1\nmax: 4\nsum: 10"
+
+async def test_statistics_float_input(client):
+    """Float input is reported as floats"""
+    text = await statistics_text(client, [1.5, 2.5, 0.5], ["median", "var", "min", "max", "sum"])
+    assert text == "Statistics for 3 numbers:\nmedian: 1.5\nvar: 0.6666666666666666\nmin: 0.5\nmax: 2.5\nsum: 4.5"
+
+async def test_statistics_big_ints_stay_exact(client):
+    """Ints beyond int64 keep exact min, max and sum instead of dropping to floats"""
+    text = await statistics_text(client, [10**20, 1, 3], ["median", "min", "max", "sum"])
+    assert text == "Statistics for 3 numbers:\nmedian: 3\nmin: 1\nmax: 100000000000000000000\nsum: 100000000000000000004"
+
+async def test_statistics_sum_near_int64_limit(client):
+    """Int input whose sum would overflow int64 is still summed exactly"""
+    text = await statistics_text(client, [2**63 - 1, 1], ["min", "max", "sum"])
+    assert text == "Statistics for 2 numbers:\nmin: 1\nmax: 9223372036854775807\nsum: 9223372036854775808"
+
+async def test_statistics_mixed_types_keep_element_types(client):
+    """Mixed int and float input reports each selected element as given"""
+    text = await statistics_text(client, [3, 1.0, 2, 4.5, 0], ["median", "min", "max", "sum"])
+    assert text == "Statistics for 5 numbers:\nmedian: 2\nmin: 0\nmax: 4.5\nsum: 10.5"
+
+async def test_statistics_bools(client):
+    """Booleans are reported as booleans, as Python's min, max and median give them"""
+    text = await statistics_text(client, [True, False, True], ["median", "min", "max", "sum"])
+    assert text == "Statistics for 3 numbers:\nmedian: True\nmin: False\nmax: True\nsum: 2"
+
+@pytest.mark.parametrize("expression", [
+    "(1).real",
+    "(1, 2)[0]",
+    "(lambda: 1)()",
+    "True",
+    "'a' * 3",
+    "None",
+    "__import__('os')",
+])
+def test_compile_expression_rejects(calculator, expression):
+    """Syntax outside the arithmetic whitelist is refused before compiling"""
+    with pytest.raises(ValueError):
+        calculator.compile_expression(expression)
+
+@pytest.mark.parametrize("expression, expected", [
+    ("2 + 3 * 4", 14.0),
+    ("min(1, 2)", 1.0),
+    ("round(3.14159, 2)", 3.14),
+])
+def test_compile_expression_accepts(calculator, expression, expected):
+    """Whitelisted arithmetic and functions evaluate normally"""
+    assert calculator.safe_eval(expression) == expected
+
+async def test_calculate_rejects_attribute_access(client):
+    """The calculate tool answers a disallowed expression with a 400"""
+    response = await client.post("/tools/calculate", json={"arguments": {"expression": "(1).__class__"}})
+    assert response.status_code == 400
+    assert "Attribute" in response.json()["detail"]
+
+async def advanced_math(client, operation, value):
+    return await client.post("/tools/advanced_math", json={"arguments": {"operation": operation, "value": value}})
+
+@pytest.mark.parametrize("value", [5, 1001, 1558])
+async def test_factorial(client, value):
+    """Factorials are exact up to the largest one that can be formatted"""
+    response = await advanced_math(client, "factorial", value)
+    assert response.status_code == 200
+    assert response.json()["content"] == f"Operation: factorial({value})\nResult: {math.factorial(value)}"
+
+async def test_factorial_beyond_digit_limit(client):
+    """A factorial too long to format is reported as a client error"""
+    response = await advanced_math(client, "factorial", 1559)
+    assert response.status_code == 400
+    assert "digits" in response.json()["detail"]
@@ -0,0 +1,115 @@
+import importlib.util
+from pathlib import Path
+
+import orjson
+import pytest
+import httpx
+
+MEMORY_MAIN = Path(__file__).parent.parent / "mcp_servers" / "memory_server" / "main.py"
+
+def memory_record(content, category="general"):
+    return {"content": content, "category": category, "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"}
+
+def log_line(op, key, value=None):
+    return orjson.dumps({"op": op, "key": key, "value": value}, option=orjson.OPT_APPEND_NEWLINE)
+
+@pytest.fixture
+def memory_server(tmp_path, monkeypatch):
+    """A fresh copy of the memory server persisting into a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("memory_server_main", MEMORY_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "STORAGE_FILE", tmp_path / "memory_storage.json")
+    monkeypatch.setattr(module, "LOG_FILE", tmp_path / "memory_storage.log")
+    yield module
+    if module.log_file is not None:
+        module.log_file.close()
+
+def test_load_replays_set_and_delete(memory_server):
+    """Log records are replayed over the snapshot, then folded into it"""
+    memory_server.STORAGE_FILE.write_bytes(orjson.dumps({
+        "memories": {"kept": memory_record("from snapshot"), "dropped": memory_record("old")},
+        "conversations": {},
+        "entities": {}
+    }))
+    memory_server.LOG_FILE.write_bytes(
+        log_line("set", "added", memory_record("from log"))
+        + log_line("set", "kept", memory_record("updated"))
+        + log_line("delete", "dropped")
+    )
+
+    memory_server.load_memory()
+
+    memories = memory_server.memory_store["memories"]
+    assert set(memories) == {"kept", "added"}
+    assert memories["kept"]["content"] == "updated"
+    assert memories["added"]["content"] == "from log"
+    assert orjson.loads(memory_server.STORAGE_FILE.read_bytes())["memories"] == memories
+    assert not memory_server.LOG_FILE.exists()
+
+def test_load_ignores_truncated_final_record(memory_server):
+    """A record torn by a crash mid-write is skipped, keeping everything before it"""
+    memory_server.LOG_FILE.write_bytes(
+        log_line("set", "complete", memory_record("intact"))
+        + log_line("set", "torn", memory_record("partial"))[:20]
+    )
+
+    memory_server.load_memory()
+
+    assert set(memory_server.memory_store["memories"]) == {"complete"}
+
+async def test_shutdown_folds_log_into_snapshot(memory_server):
+    """Writes made while running end up in the snapshot and the log is emptied on shutdown"""
+    app = memory_server.app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for key in ("first", "second"):
+                response = await client.post("/tools/store_memory", json={"arguments": {"key": key, "content": f"{key} memory"}})
+                assert response.status_code == 200
+            response = await client.post("/tools/delete_memory", json={"arguments": {"key": "first"}})
+            assert response.status_code == 200
+
+    snapshot = orjson.loads(memory_server.STORAGE_FILE.read_bytes())
+    assert set(snapshot["memories"]) == {"second"}
+    assert snapshot["memories"]["second"]["content"] == "second memory"
+    assert memory_server.LOG_FILE.read_bytes() == b""
+
+async def test_updates_keep_memory_order(memory_server):
+    """Updating a memory keeps its place in listings and category results"""
+    app = memory_server.app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def call(tool, **arguments):
+                response = await client.post(f"/tools/{tool}", json={"arguments": arguments})
+                assert response.status_code == 200
+                return response.json()["content"]
+
+            for key, category in (("a", "general"), ("b", "general"), ("c", "general"), ("d", "work")):
+                await call("store_memory", key=key, content=f"{key} note", category=category)
+            await call("store_memory", key="a", content="a note, revised")
+            await call("store_memory", key="b", content="b moved", category="work")
+
+            assert await call("list_memories") == (
+                "Found 4 memories:\n"
+                "- a (general): a note, revised...\n"
+                "- b (work): b moved...\n"
+                "- c (general): c note...\n"
+                "- d (work): d note..."
+            )
+            assert await call("list_memories", category="general") == (
+                "Found 2 memories:\n"
+                "- a (general): a note, revised...\n"
+                "- c (general): c note..."
+            )
+            assert await call("search_memories", query="", category="work") == (
+                "Found 2 memories:\n"
+                "- b (work): b moved...\n"
+                "- d (work): d note..."
+            )
+            assert await call("search_memories", query="revised") == (
+                "Found 1 memories:\n"
+                "- a (general): a note, revised..."
+            )
@@ -0,0 +1,348 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import orjson
+import pytest
+import httpx
+
+RAG_MAIN = Path(__file__).parent.parent / "mcp_servers" / "rag_server" / "main.py"
+
+def document(doc_id, content, score=None, **fields):
+    return {"id": doc_id, "content": content, "similarity_score": score, **fields}
+
+class FakeRagService:
+    """In-process stand-in for the RAG service that records the requests it gets"""
+
+    def __init__(self):
+        self.requests = []
+        self.documents = {}
+        self.release = None
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        payload = orjson.loads(request.content)
+        self.requests.append((request.url.path, payload))
+        if self.release is not None:
+            await self.release.wait()
+
+        documents = self.documents.get(payload.get("configuration_name"))
+        if documents is None:
+            return httpx.Response(404, json={"detail": "Configuration not found"})
+        if request.url.path.endswith("/query"):
+            return httpx.Response(200, json={
+                "answer": f"Answer to {payload['query']}",
+                "sources": documents,
+                "configuration_name": payload["configuration_name"],
+                "processing_time": 0.5
+            })
+        documents = documents[:payload.get("k", len(documents))]
+        return httpx.Response(200, json={
+            "documents": documents,
+            "total_found": len(documents),
+            "configuration_name": payload["configuration_name"],
+            "processing_time": 0.25
+        })
+
+    async def wait_for_requests(self, count):
+        """Let other tasks run until the service has received count requests"""
+        for _ in range(100):
+            if len(self.requests) >= count:
+                return
+            await asyncio.sleep(0)
+        raise AssertionError(f"Expected {count} upstream requests, got {len(self.requests)}")
+
+@pytest.fixture
+def rag():
+    """A fresh copy of the RAG server, so caches and in-flight requests start empty"""
+    spec = importlib.util.spec_from_file_location("rag_server_main", RAG_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def rag_service():
+    return FakeRagService()
+
+@pytest.fixture
+async def client(rag, rag_service):
+    """Create an async test client for the RAG server, with the fake service as its upstream"""
+    async with rag.app.router.lifespan_context(rag.app):
+        await rag.app.state.rag_client.aclose()
+        rag.app.state.rag_client = httpx.AsyncClient(
+            base_url=rag.RAG_API_BASE,
+            transport=httpx.MockTransport(rag_service.handle)
+        )
+        transport = httpx.ASGITransport(app=rag.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+
+RETRIEVE_PAYLOAD = {"query": "q", "configuration_name": "a", "k": 5}
+
+async def test_concurrent_identical_requests_share_one_call(rag, rag_service, client):
+    """Identical requests made while one is in flight wait for it instead of calling again"""
+    rag_service.documents["a"] = [document("1", "alpha")]
+    rag_service.release = asyncio.Event()
+
+    first = asyncio.create_task(rag.post_json("/retrieve", RETRIEVE_PAYLOAD, timeout=5.0))
+    second = asyncio.create_task(rag.post_json("/retrieve", dict(RETRIEVE_PAYLOAD), timeout=5.0))
+    await rag_service.wait_for_requests(1)
+    rag_service.release.set()
+    results = await asyncio.gather(first, second)
+
+    assert len(rag_service.requests) == 1
+    assert results[0] is results[1]
+    assert results[0]["documents"][0]["content"] == "alpha"
+    assert not rag.INFLIGHT_REQUESTS
+
+async def test_inflight_entry_cleared_after_error(rag, rag_service, client):
+    """A failed request is not left behind for later callers to share"""
+    rag_service.release = asyncio.Event()
+
+    callers = [asyncio.create_task(rag.post_json("/retrieve", RETRIEVE_PAYLOAD, timeout=5.0)) for _ in range(2)]
+    await rag_service.wait_for_requests(1)
+    rag_service.release.set()
+    for caller in callers:
+        with pytest.raises(httpx.HTTPStatusError):
+            await caller
+    assert not rag.INFLIGHT_REQUESTS
+
+    rag_service.documents["a"] = [document("1", "alpha")]
+    result = await rag.post_json("/retrieve", RETRIEVE_PAYLOAD, timeout=5.0)
+    assert result["documents"][0]["content"] == "alpha"
+    assert len(rag_service.requests) == 2
+
+async def test_cancelled_waiter_does_not_cancel_shared_request(rag, rag_service, client):
+    """A caller going away leaves the shared request running for the others"""
+    rag_service.documents["a"] = [document("1", "alpha")]
+    rag_service.release = asyncio.Event()
+
+    cancelled = asyncio.create_task(rag.post_json("/retrieve", RETRIEVE_PAYLOAD, timeout=5.0))
+    remaining = asyncio.create_task(rag.post_json("/retrieve", RETRIEVE_PAYLOAD, timeout=5.0))
+    await rag_service.wait_for_requests(1)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    rag_service.release.set()
+    result = await remaining
+    assert result["documents"][0]["content"] == "alpha"
+    assert len(rag_service.requests) == 1
+    assert not rag.INFLIGHT_REQUESTS
+
+# Documents 1 and 2, 3 and 6, and 5 and 7 have equal RRF scores, so the cut-offs
+# below fall between tied documents; 6 repeats within c and one document has no id
+FUSION_LISTS = {
+    "a": [document("1", "one"), document("2", "two"), {"content": "no id"}, document("3", "three")],
+    "b": [document("2", "two"), document("1", "one"), document("4", "four")],
+    "c": [document("5", "five"), document("6", "six"), {"content": "no id"}, document("6", "six")],
+    "d": [document("7", "seven"), document("3", "three")],
+}
+
+def fuse_both_ways(rag, monkeypatch, result_lists, k):
+    monkeypatch.setattr(rag, "NUMPY_FUSION_THRESHOLD", float("inf"))
+    heap_fused = rag.fuse_results(result_lists, "rrf", 60, k)
+    monkeypatch.setattr(rag, "NUMPY_FUSION_THRESHOLD", 0)
+    numpy_fused = rag.fuse_results(result_lists, "rrf", 60, k)
+    return heap_fused, numpy_fused
+
+@pytest.mark.parametrize("k", [1, 3, 6, 20])
+def test_numpy_rrf_matches_heapq(rag, monkeypatch, k):
+    """Both RRF paths give the same documents, order and scores, ties included"""
+    if rag.np is None:
+        pytest.skip("NumPy is not installed")
+    heap_fused, numpy_fused = fuse_both_ways(rag, monkeypatch, FUSION_LISTS, k)
+    assert numpy_fused == heap_fused
+
+def test_numpy_rrf_matches_heapq_at_threshold_size(rag, monkeypatch):
+    """Parity holds on result sets large enough to take the NumPy path by default"""
+    if rag.np is None:
+        pytest.skip("NumPy is not installed")
+    result_lists = {
+        name: [document(str((i * step) % 300), f"doc {(i * step) % 300}") for i in range(200)]
+        for name, step in (("a", 1), ("b", 7), ("c", 13))
+    }
+    heap_fused, numpy_fused = fuse_both_ways(rag, monkeypatch, result_lists, 50)
+    assert [doc["id"] for doc in numpy_fused] == [doc["id"] for doc in heap_fused]
+    assert [doc["rrf_score"] for doc in numpy_fused] == [doc["rrf_score"] for doc in heap_fused]
+    assert [doc["source_configuration"] for doc in numpy_fused] == [doc["source_configuration"] for doc in heap_fused]
+
+async def call_tool(client, tool, **arguments):
+    response = await client.post(f"/tools/{tool}", json={"arguments": arguments})
+    assert response.status_code == 200
+    return response.json()["content"]
+
+class FakeClock:
+    """Manually advanced timer for TTL caches"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+async def test_repeated_retrieval_served_from_cache(rag_service, client):
+    """The same arguments, in any key order, reuse the formatted response"""
+    rag_service.documents["a"] = [document("1", "alpha", 0.9)]
+
+    first = await call_tool(client, "retrieve_documents", query="q", configuration_name="a", k=3)
+    second = await call_tool(client, "retrieve_documents", k=3, configuration_name="a", query="q")
+
+    assert second == first
+    assert len(rag_service.requests) == 1
+
+async def test_different_arguments_miss_cache(rag_service, client):
+    """Any change to the arguments goes back to the RAG service"""
+    rag_service.documents["a"] = [document("1", "alpha", 0.9), document("2", "beta", 0.8)]
+
+    one = await call_tool(client, "retrieve_documents", query="q", configuration_name="a", k=1)
+    two = await call_tool(client, "retrieve_documents", query="q", configuration_name="a", k=2)
+    await call_tool(client, "retrieve_documents", query="other", configuration_name="a", k=2)
+
+    assert "beta" not in one
+    assert "beta" in two
+    assert len(rag_service.requests) == 3
+
+async def test_retrieval_cache_entries_expire(rag, rag_service, client, monkeypatch):
+    """Cached retrievals are refetched once their TTL has passed"""
+    clock = FakeClock()
+    monkeypatch.setattr(rag, "RETRIEVAL_CACHE", rag.TTLCache(maxsize=512, ttl=60, timer=clock))
+    rag_service.documents["a"] = [document("1", "alpha", 0.9)]
+
+    await call_tool(client, "retrieve_documents", query="q", configuration_name="a")
+    clock.now = 59
+    await call_tool(client, "retrieve_documents", query="q", configuration_name="a")
+    assert len(rag_service.requests) == 1
+
+    clock.now = 61
+    await call_tool(client, "retrieve_documents", query="q", configuration_name="a")
+    assert len(rag_service.requests) == 2
+
+async def test_generation_cache_entries_expire(rag, rag_service, client, monkeypatch):
+    """Generated answers are reused within their short TTL only"""
+    clock = FakeClock()
+    monkeypatch.setattr(rag, "GENERATION_CACHE", rag.TTLCache(maxsize=128, ttl=10, timer=clock))
+    rag_service.documents["a"] = [document("1", "alpha", 0.9)]
+
+    first = await call_tool(client, "query_with_generation", query="q", configuration_name="a")
+    second = await call_tool(client, "query_with_generation", query="q", configuration_name="a")
+    assert second == first
+    assert len(rag_service.requests) == 1
+
+    clock.now = 11
+    await call_tool(client, "query_with_generation", query="q", configuration_name="a")
+    assert len(rag_service.requests) == 2
+
+async def test_failed_retrieval_not_cached(rag_service, client):
+    """Errors are not cached, so a configuration that appears later is found"""
+    response = await client.post("/tools/retrieve_documents", json={"arguments": {"query": "q", "configuration_name": "a"}})
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Configuration 'a' not found"
+
+    rag_service.documents["a"] = [document("1", "alpha", 0.9)]
+    assert "alpha" in await call_tool(client, "retrieve_documents", query="q", configuration_name="a")
+
+def without_processing_time(content):
+    return [line for line in content.split("\n") if not line.startswith("Processing time:")]
+
+async def test_parallel_multi_config_fuses_locally(rag_service, client):
+    """Parallel retrieval queries each configuration separately and RRF-fuses the results"""
+    rag_service.documents["a"] = [document("1", "alpha", 0.9), document("2", "beta", 0.8)]
+    rag_service.documents["b"] = [document("3", "gamma", 0.7), document("1", "alpha", 0.9)]
+
+    content = await call_tool(client, "retrieve_multi_config", query="q", configuration_names=["a", "b"], parallel=True)
+
+    assert sorted(payload["configuration_name"] for _, payload in rag_service.requests) == ["a", "b"]
+    assert without_processing_time(content) == [
+        "Found 3 relevant documents for query: 'q'",
+        "Configurations: a, b",
+        "Fusion method: rrf",
+        "",
+        "Documents:",
+        "",
+        "1. Score: 0.9",
+        f"   RRF Score: {1 / 61 + 1 / 62}",
+        "   Source Config: a",
+        "   Content: alpha...",
+        "",
+        "2. Score: 0.7",
+        f"   RRF Score: {1 / 61}",
+        "   Source Config: b",
+        "   Content: gamma...",
+        "",
+        "3. Score: 0.8",
+        f"   RRF Score: {1 / 62}",
+        "   Source Config: a",
+        "   Content: beta...",
+    ]
+
+async def test_parallel_multi_config_skips_failed_configuration(rag_service, client):
+    """A configuration that fails is left out of the fusion instead of failing the call"""
+    rag_service.documents["a"] = [document("1", "alpha", 0.9), document("2", "beta", 0.8)]
+
+    content = await call_tool(
+        client, "retrieve_multi_config",
+        query="q", configuration_names=["missing", "a"], parallel=True, fusion_method="simple"
+    )
+
+    assert len(rag_service.requests) == 2
+    assert without_processing_time(content) == [
+        "Found 2 relevant documents for query: 'q'",
+        "Configurations: missing, a",
+        "Fusion method: simple",
+        "",
+        "Documents:",
+        "",
+        "1. Score: 0.9",
+        "   Source Config: a",
+        "   Content: alpha...",
+        "",
+        "2. Score: 0.8",
+        "   Source Config: a",
+        "   Content: beta...",
+    ]
+
+async def test_parallel_multi_config_fails_when_every_configuration_fails(rag_service, client):
+    """With no configuration left to fuse, the first error is reported"""
+    response = await client.post("/tools/retrieve_multi_config", json={"arguments": {
+        "query": "q", "configuration_names": ["missing", "gone"], "parallel": True
+    }})
+
+    assert response.status_code == 500
+    assert "404" in response.json()["detail"]
+    assert len(rag_service.requests) == 2
+
+async def test_malformed_documents_are_still_formatted(rag_service, client):
+    """Odd upstream documents are shown as best they can be rather than failing the call"""
+    rag_service.documents["a"] = [
+        {"content": None, "similarity_score": None},
+        {"content": 12345, "similarity_score": "high", "metadata": ["not", "a", "dict"]},
+        {"metadata": {"source": "notes.txt", "page": 3}},
+    ]
+
+    content = await call_tool(client, "retrieve_documents", query="q", configuration_name="a")
+
+    assert without_processing_time(content) == [
+        "Found 3 relevant documents for query: 'q'",
+        "Configuration: a",
+        "",
+        "Documents:",
+        "",
+        "1. Score: None",
+        "   Content: ...",
+        "",
+        "2. Score: high",
+        "   Content: 12345...",
+        "",
+        "3. Score: N/A",
+        "   Content: ...",
+        "   Source: notes.txt",
+        "   Page: 3",
+    ]
+
+async def test_malformed_sources_are_still_formatted(rag_service, client):
+    """Generated answers are returned even when a source document is malformed"""
+    rag_service.documents["a"] = [{"content": 7, "metadata": "notes.txt"}]
+
+    content = await call_tool(client, "query_with_generation", query="q", configuration_name="a")
+
+    assert content.endswith("Sources (1):\n\n1. Score: N/A\n   Content: 7...")